@@ -0,0 +1,92 @@
+"""
+Compares the throughput of the compiled ``FeatureEncoder`` with the previous
+per-request pandas encoding of ``AssuranceProfil``.
+
+Run from the ``api`` directory::
+
+    python -m benchmarks.encode
+"""
+
+import json
+import random
+import timeit
+
+import pandas as pd
+
+from model_encoder import FeatureEncoder
+from model_struct import AssuranceProfil
+
+COLUMNS_PATH = "models/gradient_boosting_columns.json"
+BATCH_SIZE = 1000
+REPEAT = 5
+
+
+def legacy_to_model_input(profil, expected_columns):
+    """
+    The previous ``AssuranceProfil.to_model_input`` implementation.
+    """
+    data = {
+        "age": profil.age,
+        "bmi": profil.bmi,
+        "children": profil.children,
+
+        "sex_male": 1 if profil.sex == "male" else 0,
+        "smoker_yes": 1 if profil.smoker else 0,
+
+        "region_northwest": 1 if profil.region == "northwest" else 0,
+        "region_southeast": 1 if profil.region == "southeast" else 0,
+        "region_southwest": 1 if profil.region == "southwest" else 0,
+    }
+
+    if sorted(data.keys()) != sorted(expected_columns):
+        raise ValueError("Incorrectly constructed columns.")
+
+    df = pd.DataFrame([data])
+    return df[expected_columns].astype(float)
+
+
+def random_profile():
+    return AssuranceProfil(
+        age=random.randint(18, 80),
+        sex=random.choice(["male", "female"]),
+        bmi=round(random.uniform(15, 40), 1),
+        children=random.randint(0, 5),
+        smoker=random.choice([True, False]),
+        region=random.choice(["northeast", "southeast", "southwest"]),
+    )
+
+
+def report(label, seconds, rows):
+    print(f"{label:<40} {rows / seconds:>14,.0f} rows/s")
+
+
+def main():
+    with open(COLUMNS_PATH) as f:
+        columns = json.load(f)
+
+    encoder = FeatureEncoder(columns)
+    framed_encoder = FeatureEncoder(columns, needs_feature_names=True)
+    profiles = [random_profile() for _ in range(BATCH_SIZE)]
+
+    legacy = min(timeit.repeat(
+        lambda: [legacy_to_model_input(p, columns) for p in profiles], number=1, repeat=REPEAT
+    ))
+    single = min(timeit.repeat(
+        lambda: [encoder.encode([p]) for p in profiles], number=1, repeat=REPEAT
+    ))
+    single_framed = min(timeit.repeat(
+        lambda: [framed_encoder.to_model_input(framed_encoder.encode([p])) for p in profiles],
+        number=1, repeat=REPEAT
+    ))
+    batch = min(timeit.repeat(
+        lambda: encoder.encode(profiles), number=1, repeat=REPEAT
+    ))
+
+    report("legacy to_model_input (1 row)", legacy, BATCH_SIZE)
+    report("FeatureEncoder.encode (1 row)", single, BATCH_SIZE)
+    report("FeatureEncoder.encode + DataFrame (1 row)", single_framed, BATCH_SIZE)
+    report(f"FeatureEncoder.encode ({BATCH_SIZE} rows)", batch, BATCH_SIZE)
+
+
+if __name__ == "__main__":
+    main()
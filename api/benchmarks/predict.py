@@ -0,0 +1,54 @@
+"""
+Compares the latency of the compiled predictors with ``model.predict``, and
+checks that both give the same predictions.
+
+Every model of the ``models`` directory is loaded, and its compiled
+predictor, when it has one, is timed against the default predictor on
+single rows and on a batch.
+
+Run from the ``api`` directory::
+
+    python -m benchmarks.predict
+"""
+
+import timeit
+
+import numpy as np
+
+from model_compile import ModelPredictor, parity_inputs
+from model_load import ModelRegistry
+
+BATCH_SIZE = 1000
+SINGLE_CALLS = 1000
+REPEAT = 5
+
+
+def per_call(func, number):
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) / number
+
+
+def report(model_name, label, candidate, X, expected):
+    error = float(np.max(np.abs(candidate(X) - expected)))
+    single = per_call(lambda: candidate(X[:1]), SINGLE_CALLS)
+    batch = per_call(lambda: candidate(X), 10)
+    print(f"{model_name:<20} {label:<22} {single * 1e6:>12.1f} {batch * 1e3:>16.3f} {error:>12.2e}")
+
+
+def main():
+    registry = ModelRegistry()
+    print(f"{'model':<20} {'path':<22} {'1 row (us)':>12} {f'{BATCH_SIZE} rows (ms)':>16} {'max error':>12}")
+
+    for model_name in registry:
+        entry = registry.get(model_name)
+        reference = ModelPredictor(entry["model"], entry["encoder"])
+        predictor = entry["predictor"]
+
+        X = parity_inputs(entry["encoder"], BATCH_SIZE, seed=1)
+        expected = reference.predict(X)
+        report(model_name, "model.predict", reference.predict, X, expected)
+        if predictor.compiled:
+            report(model_name, type(predictor).__name__, predictor.predict, X, expected)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measures the worker start-up cost removed by reading the risk thresholds from
+the models' ``_metadata.json`` instead of the training CSV.
+
+The CSV is no longer shipped with the API, so the previous import-time work is
+replayed against the copy of the ``data_model`` project.
+
+Run from the ``api`` directory::
+
+    python -m benchmarks.startup
+"""
+
+import json
+import subprocess
+import sys
+import timeit
+
+DATASET_PATH = "../data_model/data_src/inssurance.csv"
+METADATA_PATH = "models/gradient_boosting_metadata.json"
+REPEAT = 5
+
+
+def legacy_thresholds():
+    """
+    The previous import-time work of ``plan.py``.
+    """
+    import pandas as pd
+
+    df = pd.read_csv(DATASET_PATH)
+    return df["charges"].quantile(0.33), df["charges"].quantile(0.66)
+
+
+def metadata_thresholds():
+    with open(METADATA_PATH) as f:
+        return json.load(f)["risk_thresholds"]
+
+
+def import_time(statement):
+    """
+    Returns the wall time of ``statement`` in a fresh interpreter, in seconds.
+    """
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    legacy = min(timeit.repeat(legacy_thresholds, number=1, repeat=REPEAT))
+    metadata = min(timeit.repeat(metadata_thresholds, number=1, repeat=REPEAT))
+
+    print(f"{'thresholds from CSV (previous)':<36} {legacy * 1000:>10.2f} ms")
+    print(f"{'thresholds from _metadata.json':<36} {metadata * 1000:>10.2f} ms")
+
+    cold_legacy = min(import_time(
+        "import pandas as pd; df = pd.read_csv('" + DATASET_PATH + "'); df['charges'].quantile([0.33, 0.66])"
+    ) for _ in range(REPEAT))
+    cold_plan = min(import_time("import plan") for _ in range(REPEAT))
+
+    print(f"{'cold pandas import + CSV (previous)':<36} {cold_legacy * 1000:>10.2f} ms")
+    print(f"{'cold import plan':<36} {cold_plan * 1000:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
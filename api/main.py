@@ -1,16 +1,43 @@
 import os
-from fastapi import FastAPI, HTTPException
+import secrets
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Body, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import ValidationError
 
-from model_struct import PredictionResponse
+from model_struct import PredictionResponse, PredictionError
 from plan import DEDUCTIBLE_RATE, CEILING_RATE
-from plan import build_recommendation
-from model_struct import AssuranceProfil
-from model_load import load_models
+from plan import build_recommendations
+from model_struct import AssuranceProfil, Explain
+from model_load import ModelRegistry
+from model_explain import get_explainer, clear_explainers
+from prediction_cache import PredictionCache
 
 SERVER_DOMAIN = os.getenv("SERVER_DOMAIN")
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "10000"))
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+MODELS_PRELOAD = os.getenv("MODELS_PRELOAD", "true").lower() in ("1", "true", "yes")
+MODELS_WATCH_INTERVAL = float(os.getenv("MODELS_WATCH_INTERVAL", "0"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+
+def on_model_changed(model_name):
+    """
+    Drops the explainers and cached predictions of a reloaded or removed model.
+    """
+    clear_explainers(model_name)
+    prediction_cache.invalidate(model_name)
 
-models = load_models()
+models = ModelRegistry()
+models.add_listener(on_model_changed)
+if MODELS_PRELOAD:
+    models.preload()
+if MODELS_WATCH_INTERVAL > 0:
+    models.watch(MODELS_WATCH_INTERVAL)
 app = FastAPI()
 
 origins = [
@@ -35,18 +62,21 @@ def list_models():
 
     This function retrieves all available models defined in the system and collects
     their benchmark metrics along with the associated column specifications. The
-    resulting dictionary maps model names to their respective metrics and columns.
+    resulting dictionary maps model names to their respective metrics, columns and
+    loading status. Models do not need to be loaded to be listed.
 
     :return: A dictionary where each key is the model name and the value is another
-        dictionary containing the model's benchmark metrics and column definitions.
+        dictionary containing the model's benchmark metrics, column definitions and
+        loading status ("pending", "loading", "loaded" or "failed").
     :rtype: dict
     """
     return {
         name: {
-            "metrics": model_data["benchmark"],
-            "columns": model_data["columns"]
+            "metrics": info["benchmark"],
+            "columns": info["columns"],
+            "status": status
         }
-        for name, model_data in models.items()
+        for name, (info, status) in models.snapshot().items()
     }
 
 
@@ -71,7 +101,7 @@ def get_model(model_name: str):
     if model_name not in models:
         raise HTTPException(status_code=404, detail=f"Model '{model_name}' does not exist.")
 
-    model_info = models[model_name]
+    model_info = models.info(model_name)
 
     return {
         "model_name": model_name,
@@ -80,7 +110,7 @@ def get_model(model_name: str):
     }
 
 @app.post("/models/{model_name}/predict", response_model=PredictionResponse)
-def predict(model_name: str, profil: AssuranceProfil):
+def predict(model_name: str, profil: AssuranceProfil, explain: Explain = Query(Explain.top3)):
     """
     Handles prediction requests for specified machine learning models and computes
     associated information like prediction intervals and recommendations.
@@ -93,6 +123,9 @@ def predict(model_name: str, profil: AssuranceProfil):
     :param model_name: The name of the model to be used for prediction.
     :param profil: An object providing input data for the model, expected to match
                    the required input column schema.
+    :param explain: The SHAP explanation level: ``none`` skips SHAP entirely,
+                    ``top3`` returns the three most influential features and
+                    ``full`` returns every feature contribution.
     :return: A dictionary with the prediction results, including:
              - `prediction` (float): The predicted output.
              - `interval` (list[float]): Confidence interval around the prediction,
@@ -105,27 +138,199 @@ def predict(model_name: str, profil: AssuranceProfil):
     if model_name not in models:
         raise HTTPException(status_code=404, detail="Model not found.")
 
-    model_info = models[model_name]
-    model = model_info["model"]
-    columns = model_info["columns"]
-    benchmark = model_info["benchmark"]
+    model_info = get_loaded_model(model_name)
+
+    key = PredictionCache.make_key(model_name, model_info["version"], profil, explain)
+    cached = prediction_cache.get(key)
+    if cached is not None:
+        return cached
 
     try:
-        df = profil.to_model_input(columns)
+        X = model_info["encoder"].encode([profil])
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    prediction = model.predict(df)[0]
-    mae = benchmark.get("MAE", 0)
+    response = predict_rows(model_name, model_info, X, explain)[0]
+    prediction_cache.set(key, response)
+    return response
 
-    recommendation = build_recommendation(prediction, model, df)
 
-    return {
-        "prediction": round(prediction, 2),
-        "interval": [round(prediction - mae, 2), round(prediction + mae, 2)],
-        "mae": round(mae, 2),
-        **recommendation
-    }
+@app.post(
+    "/models/{model_name}/predict/batch",
+    response_model=List[Union[PredictionResponse, PredictionError]]
+)
+def predict_batch(
+    model_name: str,
+    profils: List[Dict[str, Any]] = Body(...),
+    explain: Explain = Query(Explain.top3)
+):
+    """
+    Handles batch prediction requests for a list of insurance profiles.
+
+    Every valid profile missing from the prediction cache is encoded into a
+    single input matrix, which is then sent through one vectorized model
+    prediction and one SHAP evaluation. Profiles that fail validation do not
+    abort the batch: they are reported in place as a ``PredictionError``.
+
+    :param model_name: The name of the model to be used for prediction.
+    :param profils: The raw profiles to be predicted, each expected to match
+                    the ``AssuranceProfil`` schema.
+    :param explain: The SHAP explanation level, see ``predict``.
+    :return: A list with one entry per submitted profile, in input order. Each
+             entry is either a ``PredictionResponse`` or a ``PredictionError``.
+    :raises HTTPException: When the given model name is not valid, when the
+                           batch exceeds ``BATCH_MAX_SIZE`` or when the profiles
+                           cannot be encoded for the model.
+    """
+    if model_name not in models:
+        raise HTTPException(status_code=404, detail="Model not found.")
+
+    if len(profils) > BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(profils)} profiles, maximum is {BATCH_MAX_SIZE}."
+        )
+
+    model_info = get_loaded_model(model_name)
+
+    results = [None] * len(profils)
+    pending_indices = []
+    pending_keys = []
+    pending_profils = []
+    for index, raw in enumerate(profils):
+        try:
+            profil = AssuranceProfil.model_validate(raw)
+        except ValidationError as e:
+            results[index] = {"index": index, "error": str(e)}
+            continue
+
+        key = PredictionCache.make_key(model_name, model_info["version"], profil, explain)
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending_indices.append(index)
+            pending_keys.append(key)
+            pending_profils.append(profil)
+
+    if pending_profils:
+        try:
+            X = model_info["encoder"].encode(pending_profils)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        responses = predict_rows(model_name, model_info, X, explain)
+        for index, key, response in zip(pending_indices, pending_keys, responses):
+            prediction_cache.set(key, response)
+            results[index] = response
+
+    return results
+
+
+def get_loaded_model(model_name):
+    """
+    Returns the loaded registry entry of a model, waiting for it to be loaded.
+
+    :param model_name: The name of the model.
+    :type model_name: str
+    :return: The loaded entry of the model, as returned by ``ModelRegistry.get``.
+    :rtype: dict
+    :raises HTTPException: 404 when the model was removed by a reload since
+        the caller checked it, 503 when it could not be deserialized.
+    """
+    try:
+        return models.get(model_name)
+    except KeyError as e:
+        # Retiré par un rechargement entre le test d'existence et le get
+        if model_name not in models:
+            raise HTTPException(status_code=404, detail="Model not found.")
+        raise HTTPException(status_code=503, detail=f"Model '{model_name}' could not be loaded: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Model '{model_name}' could not be loaded: {e}")
+
+
+def predict_rows(model_name, model_info, X, explain=Explain.top3):
+    """
+    Predicts every row of an encoded input and builds the associated responses.
+
+    The predictor of the model is called once on the whole input and the
+    recommendations are built in a single vectorized pass, whatever the
+    number of rows.
+
+    :param model_name: The name of the model to be used for prediction.
+    :type model_name: str
+    :param model_info: The loaded registry entry of the model, as returned by
+                       ``ModelRegistry.get``.
+    :type model_info: dict
+    :param X: The encoded input, one row per profile, as returned by the
+              model's ``FeatureEncoder``.
+    :type X: numpy.ndarray
+    :param explain: The SHAP explanation level of the responses.
+    :type explain: Explain
+    :return: A list of prediction responses, in the order of the rows of ``X``.
+    :rtype: list[dict]
+    """
+    columns = model_info["columns"]
+    mae = model_info["benchmark"].get("MAE", 0)
+
+    predictions = model_info["predictor"].predict(X)
+
+    explainer = None
+    if explain != Explain.none:
+        explainer = get_explainer(model_name, model_info)
+    top_n = None if explain == Explain.full else 3
+    recommendations = build_recommendations(
+        predictions, model_info["metadata"]["risk_thresholds"], explainer, X, columns, top_n
+    )
+
+    return [
+        {
+            "prediction": round(prediction, 2),
+            "interval": [round(prediction - mae, 2), round(prediction + mae, 2)],
+            "mae": round(mae, 2),
+            **recommendation
+        }
+        for prediction, recommendation in zip(predictions.tolist(), recommendations)
+    ]
+
+@app.post("/admin/models/reload")
+def reload_models(model_name: Optional[str] = Query(None), x_admin_token: Optional[str] = Header(None)):
+    """
+    Hot-reloads the models whose files changed in the models directory.
+
+    New and changed models are loaded and validated, then swapped in the
+    registry in a single step, without restarting the worker. Requests already
+    running keep the previous version of the model. A model that fails to load
+    keeps serving its previous version. The endpoint is disabled unless
+    ``ADMIN_TOKEN`` is set, and the token must be sent in the
+    ``X-Admin-Token`` header.
+
+    :param model_name: Restricts the reload to a single model. When omitted,
+        the whole models directory is reloaded.
+    :param x_admin_token: The admin token, compared to ``ADMIN_TOKEN``.
+    :return: A report listing the ``reloaded``, ``removed`` and ``failed`` models.
+    :rtype: dict
+    :raises HTTPException: 503 when no ``ADMIN_TOKEN`` is configured, 403
+        when the admin token is missing or invalid.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Model reload is disabled, set ADMIN_TOKEN to enable it.")
+    if not secrets.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+    return models.reload(model_name)
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Returns the state and counters of the in-process prediction cache.
+
+    :return: A dictionary with the cache size, its configured ``max_entries``
+        and ``ttl``, and its ``hits``, ``misses``, ``evictions`` and
+        ``expirations`` counters since the worker started.
+    :rtype: dict
+    """
+    return prediction_cache.stats()
 
 @app.get("/plans")
 def list_plans():
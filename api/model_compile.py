@@ -0,0 +1,313 @@
+import logging
+import os
+import timeit
+from types import SimpleNamespace
+
+import numba
+import numpy as np
+from sklearn.dummy import DummyRegressor
+from sklearn.ensemble import GradientBoostingRegressor
+
+MODELS_COMPILE = os.getenv("MODELS_COMPILE", "true").lower() in ("1", "true", "yes")
+MODELS_NTHREAD = int(os.getenv("MODELS_NTHREAD", "0"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+PARITY_ROWS = 256
+PARITY_RTOL = 1e-6
+PARITY_ATOL = 1e-6
+SPEED_ROWS = 1000
+SPEED_REPEAT = 5
+SPEED_SINGLE_CALLS = 20
+# Un gain plus faible se perd dans le bruit de mesure, et le choix changerait d'un chargement à l'autre
+SPEED_MAX_RATIO = 0.85
+
+logger = logging.getLogger(__name__)
+
+
+class ModelPredictor:
+    """
+    Default predictor, calling the ``predict`` method of the model itself.
+
+    The encoded matrix is wrapped in a DataFrame first when the model checks
+    its feature names, see ``FeatureEncoder.to_model_input``.
+
+    :ivar model: The trained model.
+    :type model: Any
+    :ivar encoder: The feature encoder of the model.
+    :type encoder: FeatureEncoder
+    """
+
+    compiled = False
+
+    def __init__(self, model, encoder):
+        self.model = model
+        self.encoder = encoder
+
+    def predict(self, X):
+        return np.asarray(self.model.predict(self.encoder.to_model_input(X)), dtype=float)
+
+
+class LinearPredictor:
+    """
+    Compiled predictor for linear models, evaluated as a single dot product.
+
+    ``linear_regression`` and ``ridge_regression`` are affine functions of
+    the encoded features, so their coefficients and intercept are extracted
+    once and the prediction skips the input validation of scikit-learn.
+
+    :ivar coef: The coefficients of the linear model, in the column order.
+    :type coef: numpy.ndarray
+    :ivar intercept: The intercept of the linear model.
+    :type intercept: float
+    """
+
+    compiled = True
+
+    def __init__(self, model):
+        self.coef = np.ascontiguousarray(model.coef_, dtype=float).ravel()
+        self.intercept = float(np.ravel(model.intercept_)[0])
+
+    def predict(self, X):
+        return X @ self.coef + self.intercept
+
+
+class BoosterPredictor:
+    """
+    Compiled predictor for XGBoost models, calling the booster in place.
+
+    ``Booster.inplace_predict`` reads the NumPy matrix directly, without the
+    ``DMatrix`` construction and input checks of the scikit-learn wrapper.
+    The predictor works on a copy of the booster limited to ``nthread``
+    threads, so the uvicorn workers sharing the machine do not oversubscribe
+    its cores, while the model itself is left untouched.
+
+    :ivar booster: The copy of the booster of the model.
+    :type booster: xgboost.Booster
+    :ivar iteration_range: The boosting rounds used, up to the best
+        iteration when the model was trained with early stopping.
+    :type iteration_range: tuple[int, int]
+    """
+
+    compiled = True
+
+    def __init__(self, model, nthread):
+        self.booster = model.get_booster().copy()
+        self.booster.set_param({"nthread": nthread})
+        best_iteration = getattr(model, "best_iteration", None)
+        self.iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+
+    def predict(self, X):
+        return np.asarray(self.booster.inplace_predict(X, iteration_range=self.iteration_range), dtype=float)
+
+
+class TreeEnsemblePredictor:
+    """
+    Compiled predictor for gradient boosting regressors, as flat node arrays.
+
+    The nodes of every tree are concatenated into contiguous ``feature``,
+    ``threshold``, ``left``, ``right`` and ``value`` arrays, the leaves
+    pointing to themselves, and walked by a numba kernel. It is compiled on
+    the first call, which happens in the loading thread pool during the
+    parity check. The leaf values are scaled by the learning rate and added
+    to the initial prediction tree by tree, as in scikit-learn.
+
+    :ivar roots: The index of the root node of each tree.
+    :type roots: numpy.ndarray
+    :ivar baseline: The initial prediction of the model.
+    :type baseline: float
+    """
+
+    compiled = True
+
+    def __init__(self, model, baseline):
+        trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+        offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+
+        feature, threshold, left, right, value = [], [], [], [], []
+        for offset, tree in zip(offsets, trees):
+            nodes = np.arange(tree.node_count) + offset
+            leaf = tree.children_left == -1
+            feature.append(np.where(leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            left.append(np.where(leaf, nodes, tree.children_left + offset))
+            right.append(np.where(leaf, nodes, tree.children_right + offset))
+            value.append(tree.value[:, 0, 0])
+
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.value = np.concatenate(value) * model.learning_rate
+        self.roots = offsets[:-1].astype(np.intp)
+        self.baseline = baseline
+
+    def predict(self, X):
+        return _evaluate_trees(
+            np.asarray(X, dtype=float), self.roots, self.feature, self.threshold,
+            self.left, self.right, self.value, self.baseline
+        )
+
+
+@numba.njit(nogil=True)
+def _evaluate_trees(X, roots, feature, threshold, left, right, value, baseline):
+    out = np.full(X.shape[0], baseline)
+    for i in range(X.shape[0]):
+        for root in roots:
+            node = root
+            while left[node] != node:
+                # Comme scikit-learn, compare les features en float32
+                if np.float32(X[i, feature[node]]) <= threshold[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+            out[i] += value[node]
+    return out
+
+
+def _baseline(model):
+    """
+    Returns the constant initial prediction of a gradient boosting model, or ``None``.
+    """
+    if isinstance(model.init_, DummyRegressor):
+        return float(np.ravel(model.init_.constant_)[0])
+    if isinstance(model.init_, str) and model.init_ == "zero":
+        return 0.0
+    return None
+
+
+def model_nthread():
+    """
+    Returns the number of threads a model may use in each worker.
+
+    :return: ``MODELS_NTHREAD`` when set, otherwise the CPU count divided
+        by the number of uvicorn workers (``WEB_CONCURRENCY``), at least 1.
+    :rtype: int
+    """
+    if MODELS_NTHREAD > 0:
+        return MODELS_NTHREAD
+    return max(1, (os.cpu_count() or 1) // max(1, WEB_CONCURRENCY))
+
+
+def parity_inputs(encoder, n_rows=PARITY_ROWS, seed=0):
+    """
+    Encodes random profiles covering every sex, smoker and region value.
+
+    :param encoder: The feature encoder of the model.
+    :type encoder: FeatureEncoder
+    :param n_rows: The number of profiles.
+    :type n_rows: int
+    :param seed: The seed of the random generator.
+    :type seed: int
+    :return: The encoded matrix, one row per profile.
+    :rtype: numpy.ndarray
+    """
+    rng = np.random.default_rng(seed)
+    regions = ["northeast", "northwest", "southeast", "southwest"]
+    profiles = [
+        SimpleNamespace(
+            age=int(rng.integers(18, 81)),
+            bmi=float(np.round(rng.uniform(15, 50), 1)),
+            children=int(rng.integers(0, 6)),
+            sex="male" if i % 2 else "female",
+            smoker=bool(i // 2 % 2),
+            region=regions[i // 4 % 4],
+        )
+        for i in range(n_rows)
+    ]
+    return encoder.encode(profiles)
+
+
+def check_parity(predictor, reference, X):
+    """
+    Checks that a compiled predictor matches the model it was compiled from.
+
+    :param predictor: The compiled predictor.
+    :param reference: The default predictor of the same model.
+    :type reference: ModelPredictor
+    :param X: The encoded input both predictors are run on.
+    :type X: numpy.ndarray
+    :raises ValueError: If a prediction differs beyond the parity tolerance.
+    """
+    expected = reference.predict(X)
+    actual = np.asarray(predictor.predict(X), dtype=float)
+    if actual.shape != expected.shape or not np.allclose(actual, expected, rtol=PARITY_RTOL, atol=PARITY_ATOL):
+        error = np.max(np.abs(actual - expected)) if actual.shape == expected.shape else actual.shape
+        raise ValueError(f"Compiled predictions differ from model.predict (max error {error})")
+
+
+def _best_times(predict, X):
+    """
+    Returns the best time of ``predict`` on the whole matrix and on its first row, in seconds.
+    """
+    batch = min(timeit.repeat(lambda: predict(X), number=1, repeat=SPEED_REPEAT))
+    single = min(timeit.repeat(lambda: predict(X[:1]), number=SPEED_SINGLE_CALLS, repeat=SPEED_REPEAT))
+    return batch, single / SPEED_SINGLE_CALLS
+
+
+def is_faster(predictor, reference, X):
+    """
+    Tells whether a compiled predictor beats the model it was compiled from.
+
+    :param predictor: The compiled predictor.
+    :param reference: The default predictor of the same model.
+    :type reference: ModelPredictor
+    :param X: The encoded batch both predictors are timed on.
+    :type X: numpy.ndarray
+    :return: Whether the compiled predictor takes at most ``SPEED_MAX_RATIO``
+        times as long as the model, both on the batch and on a single row.
+    :rtype: bool
+    """
+    compiled_batch, compiled_single = _best_times(predictor.predict, X)
+    reference_batch, reference_single = _best_times(reference.predict, X)
+    return (
+        compiled_batch <= SPEED_MAX_RATIO * reference_batch
+        and compiled_single <= SPEED_MAX_RATIO * reference_single
+    )
+
+
+def _compile(model):
+    if hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        return LinearPredictor(model)
+    if hasattr(model, "get_booster"):
+        return BoosterPredictor(model, model_nthread())
+    if isinstance(model, GradientBoostingRegressor) and _baseline(model) is not None:
+        return TreeEnsemblePredictor(model, _baseline(model))
+    return None
+
+
+def compile_predictor(model, encoder, enabled=MODELS_COMPILE):
+    """
+    Returns the fastest predictor available for a model.
+
+    Supported model families are compiled into a predictor working on plain
+    NumPy arrays, which is checked against ``model.predict`` on random
+    profiles, then timed against it, before being used. Other models, and
+    compiled predictors that fail the check or are not faster, see
+    :func:`is_faster`, fall back to :class:`ModelPredictor`.
+
+    :param model: The trained model.
+    :type model: Any
+    :param encoder: The feature encoder of the model.
+    :type encoder: FeatureEncoder
+    :param enabled: Whether compiled predictors may be used at all.
+    :type enabled: bool
+    :return: An object exposing ``predict(X)`` on an encoded matrix, and a
+        ``compiled`` flag.
+    :rtype: LinearPredictor | BoosterPredictor | TreeEnsemblePredictor | ModelPredictor
+    """
+    reference = ModelPredictor(model, encoder)
+    if not enabled:
+        return reference
+
+    predictor = _compile(model)
+    if predictor is None:
+        return reference
+
+    try:
+        check_parity(predictor, reference, parity_inputs(encoder))
+    except ValueError as e:
+        logger.warning("Not using the compiled %s: %s", type(predictor).__name__, e)
+        return reference
+    if not is_faster(predictor, reference, parity_inputs(encoder, SPEED_ROWS, seed=1)):
+        logger.info("Not using the compiled %s: not faster than model.predict", type(predictor).__name__)
+        return reference
+    return predictor
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+FEATURE_NAMES = [
+    "age",
+    "bmi",
+    "children",
+    "sex_male",
+    "smoker_yes",
+    "region_northwest",
+    "region_southeast",
+    "region_southwest",
+]
+
+
+def _features(profil):
+    """
+    Encodes a profile into its one-hot features, in the order of ``FEATURE_NAMES``.
+    """
+    return (
+        profil.age,
+        profil.bmi,
+        profil.children,
+
+        profil.sex == "male",
+        profil.smoker,
+
+        profil.region == "northwest",
+        profil.region == "southeast",
+        profil.region == "southwest",
+    )
+
+
+def needs_feature_names(model):
+    """
+    Tells whether a model must be given a DataFrame rather than a NumPy array.
+
+    scikit-learn estimators fitted on a DataFrame check the feature names of
+    their input and warn on every call when they are missing. XGBoost
+    estimators accept plain arrays.
+
+    :param model: The trained model.
+    :type model: Any
+    :return: ``True`` if the model input should carry its feature names.
+    :rtype: bool
+    """
+    return hasattr(model, "feature_names_in_") and not hasattr(model, "get_booster")
+
+
+class FeatureEncoder:
+    """
+    Compiled encoder turning insurance profiles into a model input matrix.
+
+    The encoder is built once per model from its ``_columns.json`` and writes
+    each profile straight into a preallocated float64 array, following the
+    column order expected by the model.
+
+    :ivar columns: The ordered feature names expected by the model.
+    :type columns: list[str]
+    :ivar needs_feature_names: Whether the model input must be wrapped in a
+        DataFrame carrying the column names.
+    :type needs_feature_names: bool
+    """
+
+    def __init__(self, columns, needs_feature_names=False):
+        self.columns = list(columns)
+        self.needs_feature_names = needs_feature_names
+
+        self._error = None
+        if sorted(FEATURE_NAMES) != sorted(self.columns):
+            self._error = f"Incorrectly constructed columns.\nMissing: {set(self.columns) - set(FEATURE_NAMES)}"
+            self._order = None
+        else:
+            self._order = [FEATURE_NAMES.index(column) for column in self.columns]
+
+        self._identity = self._order == list(range(len(FEATURE_NAMES)))
+
+    def encode(self, profiles):
+        """
+        Encodes a list of profiles into a matrix, one row per profile.
+
+        :param profiles: The profiles to encode.
+        :type profiles: list[AssuranceProfil]
+        :return: A float64 array of shape ``(len(profiles), len(columns))``.
+        :rtype: numpy.ndarray
+        :raises ValueError: If the model columns cannot be built from a profile.
+        """
+        if self._error is not None:
+            raise ValueError(self._error)
+
+        X = np.empty((len(profiles), len(self.columns)), dtype=np.float64)
+        if self._identity:
+            for i, profil in enumerate(profiles):
+                X[i] = _features(profil)
+        else:
+            for i, profil in enumerate(profiles):
+                features = _features(profil)
+                X[i] = [features[j] for j in self._order]
+
+        return X
+
+    def to_model_input(self, X):
+        """
+        Wraps an encoded matrix in a DataFrame when the model needs feature names.
+
+        :param X: The encoded matrix, as returned by :meth:`encode`.
+        :type X: numpy.ndarray
+        :return: ``X`` itself, or a DataFrame view of it with the model columns.
+        :rtype: numpy.ndarray | pandas.DataFrame
+        """
+        if self.needs_feature_names:
+            return pd.DataFrame(X, columns=self.columns, copy=False)
+        return X
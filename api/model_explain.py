@@ -0,0 +1,124 @@
+import threading
+
+import numpy as np
+import shap
+
+_explainers = {}
+_explainers_lock = threading.Lock()
+
+
+class LinearContributions:
+    """
+    Exact SHAP values for linear models, computed in closed form.
+
+    For a linear model with independent features, the SHAP value of feature
+    ``i`` is ``coef_i * (x_i - mean_i)``. This avoids building a masker and
+    sampling the background dataset on every call.
+
+    :ivar coef: The coefficients of the linear model.
+    :type coef: numpy.ndarray
+    :ivar means: The background mean of each feature, over the training dataset.
+    :type means: numpy.ndarray
+    """
+
+    def __init__(self, model, columns, feature_means):
+        self.coef = np.asarray(model.coef_, dtype=float).ravel()
+        self.means = np.array([feature_means.get(column, 0.0) for column in columns], dtype=float)
+
+    def shap_values(self, X):
+        return (np.asarray(X, dtype=float) - self.means) * self.coef
+
+
+class TreeContributions:
+    """
+    SHAP values for tree ensembles, backed by a reusable ``shap.TreeExplainer``.
+
+    Extracting the tree structure is the expensive part of ``TreeExplainer``,
+    so the instance is built once and reused for every request.
+
+    :ivar explainer: The underlying SHAP tree explainer.
+    :type explainer: shap.TreeExplainer
+    """
+
+    def __init__(self, model):
+        self.explainer = shap.TreeExplainer(model)
+
+    def shap_values(self, X):
+        return np.asarray(self.explainer.shap_values(X, check_additivity=False))
+
+
+def build_explainer(model, columns, feature_means):
+    """
+    Builds the cheapest exact explainer available for the given model family.
+
+    Linear models (``linear_regression``, ``ridge_regression``) use the
+    closed-form ``coef * (x - mean)`` contributions, tree ensembles
+    (``gradient_boosting``, ``xgboost``) use ``shap.TreeExplainer``.
+
+    :param model: The trained model to explain.
+    :type model: Any
+    :param columns: The ordered feature names expected by the model.
+    :type columns: list[str]
+    :param feature_means: The mean of each feature over the training dataset,
+        as exported in the model's ``_metadata.json``.
+    :type feature_means: dict
+    :return: An object exposing ``shap_values(X)``, returning an array of
+        shape ``(n_rows, n_features)``.
+    :rtype: LinearContributions | TreeContributions
+    """
+    if hasattr(model, "coef_"):
+        return LinearContributions(model, columns, feature_means)
+    return TreeContributions(model)
+
+
+def get_explainer(model_name, model_info):
+    """
+    Returns the cached explainer of a model, building it on first use.
+
+    The registry is shared by every request handled by the worker, so the
+    construction is guarded by a lock to make sure concurrent requests on a
+    cold model only build a single explainer. Explainers are keyed by model
+    name and version, so a request still running on a model that was just
+    reloaded cannot hand its explainer to the new version.
+
+    :param model_name: The name of the model, used as registry key.
+    :type model_name: str
+    :param model_info: The loaded registry entry of the model, as returned by
+        ``ModelRegistry.get``.
+    :type model_info: dict
+    :return: The explainer associated with ``model_name``.
+    :rtype: LinearContributions | TreeContributions
+    """
+    key = (model_name, model_info["version"])
+    explainer = _explainers.get(key)
+    if explainer is not None:
+        return explainer
+
+    with _explainers_lock:
+        explainer = _explainers.get(key)
+        if explainer is None:
+            explainer = build_explainer(
+                model_info["model"],
+                model_info["columns"],
+                model_info["metadata"]["feature_means"]
+            )
+            _explainers[key] = explainer
+
+    return explainer
+
+
+def clear_explainers(model_name=None):
+    """
+    Drops cached explainers so they are rebuilt on next use.
+
+    :param model_name: The model whose explainers should be dropped, for
+        every version. When ``None``, the whole registry is cleared.
+    :type model_name: str | None
+    """
+    with _explainers_lock:
+        if model_name is None:
+            _explainers.clear()
+            return
+
+        for key in [key for key in _explainers if key[0] == model_name]:
+            del _explainers[key]
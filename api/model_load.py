@@ -1,55 +1,421 @@
 import os
+import itertools
 import joblib
 import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from model_compile import compile_predictor
+from model_encoder import FeatureEncoder, needs_feature_names
 
 MODELS_DIR = "models"
+MODELS_MMAP_MODE = os.getenv("MODELS_MMAP_MODE", "r") or None
+MODELS_LOAD_WORKERS = int(os.getenv("MODELS_LOAD_WORKERS", "4"))
+
+SIDECARS = {
+    "columns": "_columns.json",
+    "benchmark": "_benchmark.json",
+    "metadata": "_metadata.json",
+}
+
+logger = logging.getLogger(__name__)
+
+_versions = itertools.count(1)
+
+
+def _read_sidecars(models_dir, model_name):
+    """
+    Reads the JSON files describing a model.
+
+    :param models_dir: The directory holding the model files.
+    :type models_dir: str
+    :param model_name: The name of the model.
+    :type model_name: str
+    :raises FileNotFoundError: If one of the expected files is missing.
+    :raises JSONDecodeError: If there is an issue parsing one of the files.
+    :return: The parsed content of each sidecar, under keys ``columns``,
+        ``benchmark`` and ``metadata``.
+    :rtype: dict
+    """
+    sidecars = {}
+    for key, suffix in SIDECARS.items():
+        with open(os.path.join(models_dir, f"{model_name}{suffix}"), "r") as f:
+            sidecars[key] = json.load(f)
+    return sidecars
+
+
+def _fingerprint(models_dir, model_name):
+    """
+    Identifies the current content of a model's files on disk.
+
+    :return: The inode, size and modification time of the ``.pkl`` and of
+        each JSON file of the model.
+    :rtype: tuple
+    """
+    fingerprint = []
+    for suffix in (".pkl", *SIDECARS.values()):
+        stat = os.stat(os.path.join(models_dir, f"{model_name}{suffix}"))
+        fingerprint.append((stat.st_ino, stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprint)
+
+
+def _validate(entry):
+    """
+    Checks that a freshly loaded model can serve predictions.
+
+    The model is run on the training feature means, which must produce a
+    single finite prediction, and its metadata must hold two risk thresholds.
+
+    :param entry: The loaded registry entry to check.
+    :type entry: dict
+    :raises ValueError: If the entry cannot be used for predictions.
+    """
+    entry["encoder"].encode([])
+
+    thresholds = entry["metadata"].get("risk_thresholds")
+    if not isinstance(thresholds, list) or len(thresholds) != 2:
+        raise ValueError(f"Invalid risk thresholds: {thresholds!r}")
+
+    means = entry["metadata"].get("feature_means", {})
+    X = np.array([[means.get(column, 0.0) for column in entry["columns"]]], dtype=float)
+    prediction = np.asarray(entry["model"].predict(entry["encoder"].to_model_input(X)))
+    if prediction.shape != (1,) or not np.isfinite(prediction).all():
+        raise ValueError(f"Invalid prediction on the feature means: {prediction!r}")
+
+
+def _load_status(future):
+    """
+    Returns the loading state of a model from the future of its load.
+    """
+    if future is None:
+        return "pending"
+    if not future.done():
+        return "loading"
+    if future.exception() is not None:
+        return "failed"
+    return "loaded"
+
+
+def _load_model(path, mmap_mode):
+    """
+    Deserializes a model, memory-mapping its arrays when possible.
+
+    With ``mmap_mode="r"``, the NumPy arrays stored uncompressed in the pickle
+    are mapped read-only instead of copied, so the uvicorn workers share the
+    same pages. Compressed pickles are loaded normally by joblib.
 
-def load_models():
+    :param path: The path of the ``.pkl`` file.
+    :type path: str
+    :param mmap_mode: The joblib memory-map mode, or ``None`` to disable it.
+    :type mmap_mode: str | None
+    :return: The deserialized model.
+    :rtype: Any
     """
-    Loads machine learning models and their associated metadata from a directory.
+    if mmap_mode:
+        try:
+            return joblib.load(path, mmap_mode=mmap_mode)
+        except (ValueError, OSError) as e:
+            logger.warning("Cannot memory-map %s (%s), loading it in memory.", path, e)
+    return joblib.load(path)
 
-    This function scans a directory for files related to serialized machine learning
-    models and their configurations. For each model, it expects the following related
-    files to exist in the directory:
+
+class ModelRegistry:
+    """
+    Registry of the models available in a directory, loaded lazily.
+
+    The registry is built from the files of the models directory. For each
+    model, it expects the following related files to exist:
 
     - A `.pkl` file containing the serialized model.
     - A `_columns.json` file specifying the columns or features used by the model.
     - A `_benchmark.json` file defining the benchmark metadata.
+    - A `_metadata.json` file holding the values computed on the training
+      dataset at export time: the risk thresholds and the feature means.
 
-    It loads these files, reconstructs the model objects, and organizes them along
-    with their related metadata into a dictionary. This dictionary is returned to
-    enable easy access for further operations.
+    The JSON files are read when the registry is built, so models can be
+    listed right away. Models missing one of these files are skipped with a
+    warning. The serialized models are only deserialized on first use, or in
+    a background thread pool when :meth:`preload` is called. Concurrent
+    requests for a model that is still loading all wait for the same load.
 
-    :raises FileNotFoundError: If the expected files for the model are missing.
-    :raises JSONDecodeError: If there is an issue parsing the JSON metadata files.
-    :raises Exception: For other errors encountered during file loading.
-    :return: A dictionary of models, each containing the model, its columns,
-        and benchmark metadata organized under keys ``model``, ``columns``,
-        and ``benchmark`` respectively.
-    :rtype: dict
+    Loaded entries are dictionaries holding the model, its columns, benchmark
+    metadata, training metadata, compiled feature encoder, predictor and
+    version under keys ``model``, ``columns``, ``benchmark``, ``metadata``,
+    ``encoder``, ``predictor`` and ``version``. The predictor is compiled
+    from the model when its family has a fast path, see
+    ``model_compile.compile_predictor``. A new version number is given to a model each time its
+    files are read, so caches can tell a reloaded model from the previous one.
+
+    :meth:`reload` picks up new, changed and removed models from the
+    directory without restarting the worker. A changed model is loaded and
+    validated in the background, then swapped in a single step: requests
+    that already hold the previous entry keep using it until they finish.
+    Since loaded models may memory-map their ``.pkl``, new files must be
+    written next to the old ones and renamed over them, never overwritten in
+    place.
+
+    :ivar models_dir: The directory holding the model files.
+    :type models_dir: str
+    :ivar mmap_mode: The joblib memory-map mode used to load the models.
+    :type mmap_mode: str | None
     """
-    models = {}
 
-    for filename in os.listdir(MODELS_DIR):
-        if filename.endswith(".pkl"):
-            model_name = filename.replace(".pkl", "")
+    def __init__(self, models_dir=MODELS_DIR, mmap_mode=MODELS_MMAP_MODE, max_workers=MODELS_LOAD_WORKERS):
+        self.models_dir = models_dir
+        self.mmap_mode = mmap_mode
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-load")
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._listeners = []
+        self._infos = {}
+        self._loads = {}
+        self.discover()
+
+    def _scan(self):
+        """
+        Scans the models directory and reads the JSON files of every model.
+
+        :return: The readable models, mapped to their JSON content, ``.pkl``
+            path, file fingerprint and version, and the models whose ``.pkl``
+            exists but whose JSON files are missing or invalid, mapped to the
+            error.
+        :rtype: tuple[dict, dict]
+        """
+        filenames = set(os.listdir(self.models_dir))
+
+        infos = {}
+        broken = {}
+        for filename in sorted(filenames):
+            if not filename.endswith(".pkl"):
+                continue
+
+            model_name = filename[:-len(".pkl")]
+            try:
+                info = _read_sidecars(self.models_dir, model_name)
+                info["fingerprint"] = _fingerprint(self.models_dir, model_name)
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping model '%s': %s", model_name, e)
+                broken[model_name] = str(e)
+                continue
+
+            info["path"] = os.path.join(self.models_dir, filename)
+            info["version"] = next(_versions)
+            infos[model_name] = info
+
+        orphans = {
+            filename[:-len("_columns.json")]
+            for filename in filenames
+            if filename.endswith("_columns.json")
+        } - set(infos)
+        for model_name in sorted(orphans):
+            if f"{model_name}.pkl" not in filenames:
+                logger.warning("Skipping model '%s': no %s.pkl file.", model_name, model_name)
+
+        return infos, broken
+
+    def discover(self):
+        """
+        Scans the models directory and reads the JSON files of every model.
+
+        Models with a missing or invalid JSON file, and JSON files without a
+        matching ``.pkl``, are logged and skipped.
+        """
+        infos, _ = self._scan()
+        with self._lock:
+            self._infos = infos
+
+    def __contains__(self, model_name):
+        return model_name in self._infos
+
+    def __iter__(self):
+        return iter(list(self._infos))
+
+    def info(self, model_name):
+        """
+        Returns the JSON metadata of a model, without loading it.
+
+        :param model_name: The name of the model.
+        :type model_name: str
+        :return: The ``columns``, ``benchmark`` and ``metadata`` of the model.
+        :rtype: dict
+        :raises KeyError: If the model does not exist.
+        """
+        return self._infos[model_name]
+
+    def _load(self, model_name, info):
+        model = _load_model(info["path"], self.mmap_mode)
+        entry = {
+            "model": model,
+            "columns": info["columns"],
+            "benchmark": info["benchmark"],
+            "metadata": info["metadata"],
+            "encoder": FeatureEncoder(info["columns"], needs_feature_names(model)),
+            "version": info["version"]
+        }
+        _validate(entry)
+        entry["predictor"] = compile_predictor(model, entry["encoder"])
+        logger.info(
+            "Model '%s' loaded (version %s, %s).", model_name, info["version"], type(entry["predictor"]).__name__
+        )
+        return entry
+
+    def _submit(self, model_name):
+        with self._lock:
+            future = self._loads.get(model_name)
+            if future is None or (future.done() and future.exception() is not None):
+                future = self._executor.submit(self._load, model_name, self._infos[model_name])
+                self._loads[model_name] = future
+            return future
+
+    def get(self, model_name):
+        """
+        Returns the loaded entry of a model, loading it if needed.
 
-            model_path = os.path.join(MODELS_DIR, f"{model_name}.pkl")
-            columns_path = os.path.join(MODELS_DIR, f"{model_name}_columns.json")
-            benchmark_path = os.path.join(MODELS_DIR, f"{model_name}_benchmark.json")
+        :param model_name: The name of the model.
+        :type model_name: str
+        :return: The loaded entry of the model.
+        :rtype: dict
+        :raises KeyError: If the model does not exist.
+        :raises Exception: If the model could not be deserialized. The load is
+            attempted again on the next call.
+        """
+        return self._submit(model_name).result()
 
-            model = joblib.load(model_path)
+    def preload(self):
+        """
+        Starts loading every model in the background thread pool.
+        """
+        for model_name in self:
+            self._submit(model_name)
 
-            with open(columns_path, "r") as f:
-                columns = json.load(f)
+    def status(self):
+        """
+        Returns the loading state of every model.
 
-            with open(benchmark_path, "r") as f:
-                benchmark = json.load(f)
+        :return: A dictionary mapping each model name to ``"pending"``,
+            ``"loading"``, ``"loaded"`` or ``"failed"``.
+        :rtype: dict
+        """
+        return {model_name: status for model_name, (_, status) in self.snapshot().items()}
 
-            models[model_name] = {
-                "model": model,
-                "columns": columns,
-                "benchmark": benchmark
+    def snapshot(self):
+        """
+        Returns the JSON metadata and loading state of every model, read at once.
+
+        The registry is copied in a single step, so a concurrent
+        :meth:`reload` cannot remove a model or swap its version while the
+        result is built.
+
+        :return: A dictionary mapping each model name to its JSON metadata, as
+            returned by :meth:`info`, and its loading state, as returned by
+            :meth:`status`.
+        :rtype: dict[str, tuple[dict, str]]
+        """
+        with self._lock:
+            infos = dict(self._infos)
+            loads = dict(self._loads)
+        return {model_name: (info, _load_status(loads.get(model_name))) for model_name, info in infos.items()}
+
+    def add_listener(self, listener):
+        """
+        Registers a function called with a model name whenever that model is
+        swapped or removed by :meth:`reload`.
+
+        :param listener: The function to call.
+        :type listener: Callable[[str], None]
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, model_name):
+        for listener in self._listeners:
+            try:
+                listener(model_name)
+            except Exception:
+                logger.exception("Model listener failed for '%s'.", model_name)
+
+    def reload(self, model_name=None):
+        """
+        Hot-reloads the models whose files changed on disk.
+
+        The directory is scanned again. Every new or changed model is loaded
+        and validated in the background thread pool, then swapped in the
+        registry in a single step. A model that fails to load or validate
+        keeps serving its previous version. Models whose ``.pkl`` disappeared
+        are removed.
+
+        :param model_name: Restricts the reload to a single model. When
+            ``None``, the whole directory is reloaded.
+        :type model_name: str | None
+        :return: A report listing the ``reloaded``, ``removed`` and ``failed``
+            models, the latter mapped to their error.
+        :rtype: dict
+        """
+        report = {"reloaded": [], "removed": [], "failed": {}}
+
+        with self._reload_lock:
+            infos, broken = self._scan()
+            known = list(self._infos)
+            if model_name is not None:
+                infos = {name: info for name, info in infos.items() if name == model_name}
+                broken = {name: error for name, error in broken.items() if name == model_name}
+                known = [name for name in known if name == model_name]
+
+            report["failed"].update(broken)
+            removed = [name for name in known if name not in infos and name not in broken]
+
+            changed = {
+                name: info
+                for name, info in infos.items()
+                if name not in self._infos or self._infos[name]["fingerprint"] != info["fingerprint"]
             }
+            loads = {name: self._executor.submit(self._load, name, info) for name, info in changed.items()}
+
+            for name, load in loads.items():
+                try:
+                    load.result()
+                except Exception as e:
+                    logger.warning("Keeping the previous version of model '%s': %s", name, e)
+                    report["failed"][name] = str(e)
+                    continue
+
+                with self._lock:
+                    self._infos[name] = changed[name]
+                    self._loads[name] = load
+                report["reloaded"].append(name)
+                self._notify(name)
+
+            for name in removed:
+                with self._lock:
+                    self._infos.pop(name, None)
+                    self._loads.pop(name, None)
+                report["removed"].append(name)
+                self._notify(name)
+
+        return report
+
+    def watch(self, interval):
+        """
+        Starts a daemon thread calling :meth:`reload` every ``interval`` seconds.
+
+        :param interval: The polling interval of the models directory, in seconds.
+        :type interval: float
+        :return: The watcher thread.
+        :rtype: threading.Thread
+        """
+        def poll():
+            while True:
+                time.sleep(interval)
+                try:
+                    report = self.reload()
+                    if report["reloaded"] or report["removed"]:
+                        logger.info("Models directory changed: %s", report)
+                except Exception:
+                    logger.exception("Models reload failed.")
 
-    return models
\ No newline at end of file
+        thread = threading.Thread(target=poll, name="model-watch", daemon=True)
+        thread.start()
+        return thread
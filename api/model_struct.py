@@ -1,6 +1,5 @@
-from typing import Annotated, Union, Literal, List
+from typing import Annotated, Union, Literal, List, Optional
 
-import pandas as pd
 from pydantic import BaseModel, conint, confloat, validator, Field
 from enum import Enum
 
@@ -42,14 +41,29 @@ class Region(str, Enum):
     southeast = "southeast"
     southwest = "southwest"
 
+class Explain(str, Enum):
+    """
+    Enumeration of the SHAP explanation levels a prediction can be returned with.
+
+    :cvar none: No explanation: SHAP is skipped and ``top_factors`` is null.
+    :type none: str
+    :cvar top3: The three features with the largest impact on the prediction.
+    :type top3: str
+    :cvar full: Every feature contribution, sorted by decreasing impact.
+    :type full: str
+    """
+    none = "none"
+    top3 = "top3"
+    full = "full"
+
 class AssuranceProfil(BaseModel):
     """
     Represents an insurance profile with personal details and related attributes.
 
     This class is designed to model and manage insurance-related data for an individual.
     It includes attributes such as age, sex, body mass index (BMI), number of children,
-    smoking status, and region of residence. It also provides functionality to transform
-    the data into a format suitable for predictive modeling or analysis.
+    smoking status, and region of residence. Profiles are turned into model inputs by
+    the per-model ``FeatureEncoder`` of ``model_encoder``.
 
     :ivar age: Age of the individual. Must be between 0 and 120.
     :type age: int
@@ -71,29 +85,6 @@ class AssuranceProfil(BaseModel):
     smoker: bool
     region: Region
 
-    def to_model_input(self, expected_columns: list[str]):
-        data = {
-            "age": self.age,
-            "bmi": self.bmi,
-            "children": self.children,
-
-            "sex_male": 1 if self.sex == "male" else 0,
-            "smoker_yes": 1 if self.smoker else 0,
-
-            "region_northwest": 1 if self.region == "northwest" else 0,
-            "region_southeast": 1 if self.region == "southeast" else 0,
-            "region_southwest": 1 if self.region == "southwest" else 0,
-        }
-
-        # Vérification stricte des colonnes
-        if sorted(data.keys()) != sorted(expected_columns):
-            raise ValueError(f"Incorrectly constructed columns.\nMissing: {set(expected_columns) - set(data.keys())}")
-
-        # Transformation en DataFrame ligne unique
-        df = pd.DataFrame([data])
-        return df[expected_columns].astype(float)
-
-
 
 class TopFactor(BaseModel):
     """
@@ -171,8 +162,9 @@ class PredictionResponse(BaseModel):
     :type risk_level: Literal["lower", "moderate", "high"]
     :ivar plan: The proposed action plan related to the prediction.
     :type plan: Plan
-    :ivar top_factors: A list of key factors or contributors influencing the prediction.
-    :type top_factors: List[TopFactor]
+    :ivar top_factors: A list of key factors or contributors influencing the prediction,
+        or None when the prediction was requested without explanation.
+    :type top_factors: Optional[List[TopFactor]]
     :ivar suggestions: Recommendations or suggestions derived from the prediction or analysis.
     :type suggestions: List[str]
     """
@@ -181,5 +173,18 @@ class PredictionResponse(BaseModel):
     mae: float
     risk_level: Literal["lower", "moderate", "high"]
     plan: Plan
-    top_factors: List[TopFactor]
+    top_factors: Optional[List[TopFactor]] = None
     suggestions: List[str]
+
+
+class PredictionError(BaseModel):
+    """
+    Represents a row of a batch prediction that could not be processed.
+
+    :ivar index: The position of the row in the submitted batch.
+    :type index: int
+    :ivar error: A description of why the row was rejected.
+    :type error: str
+    """
+    index: int
+    error: str
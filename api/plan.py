@@ -1,10 +1,4 @@
-import pandas as pd
-import shap
-
-df = pd.read_csv("data_src/inssurance.csv")
-
-q1 = df["charges"].quantile(0.33)
-q2 = df["charges"].quantile(0.66)
+import numpy as np
 
 DEDUCTIBLE_RATE = {
     "lower": 0.3,
@@ -18,33 +12,100 @@ CEILING_RATE = {
     "high": 0.7
 }
 
-def get_risk_level(prediction):
+RISK_LEVELS = np.array(["lower", "moderate", "high"])
+
+
+def _risk_indices(predictions, thresholds):
+    """
+    Returns the position in ``RISK_LEVELS`` of the risk level of each prediction.
+    """
+    return np.searchsorted(thresholds, predictions, side="right")
+
+
+def get_risk_levels(predictions, thresholds):
+    """
+    Vectorized version of :func:`get_risk_level`.
+
+    Buckets every prediction against the ``q1`` and ``q2`` thresholds in a
+    single ``numpy.searchsorted`` call.
+
+    :param predictions: The predicted values to be evaluated.
+    :type predictions: numpy.ndarray
+    :param thresholds: The ``[q1, q2]`` risk thresholds of the model.
+    :type thresholds: list[float]
+    :return: An array of risk levels ("lower", "moderate" or "high"), one per
+        prediction.
+    :rtype: numpy.ndarray
+    """
+    return RISK_LEVELS[_risk_indices(predictions, thresholds)]
+
+
+def get_risk_level(prediction, thresholds):
     """
     Determines the risk level based on a given prediction threshold.
 
     The function evaluates the input `prediction` value and compares it
-    against predefined thresholds, `q1` and `q2`. It categorizes the risk
+    against the thresholds `q1` and `q2`. It categorizes the risk
     into one of three levels: "lower", "moderate", or "high", depending on
     the comparison results.
 
+    The thresholds are the 0.33 and 0.66 quantiles of the training charges.
+    They are computed when the models are exported and read from each model's
+    ``_metadata.json``.
+
     :param prediction: The numerical value representing the prediction to
         be evaluated against predefined risk thresholds.
     :type prediction: float
+    :param thresholds: The ``[q1, q2]`` risk thresholds of the model.
+    :type thresholds: list[float]
     :return: A string indicating the risk level: either "lower", "moderate",
         or "high".
     :rtype: str
     """
-    if prediction < q1:
-        return "lower"
-    elif prediction < q2:
-        return "moderate"
-    else:
-        return "high"
+    return str(get_risk_levels([prediction], thresholds)[0])
 
 MARGIN = 0.05
 
 
-def dynamic_plan(prediction):
+def dynamic_plan_batch(predictions, thresholds):
+    """
+    Vectorized version of :func:`dynamic_plan`.
+
+    Computes the risk level, franchise, ceiling, refund and prices of every
+    prediction at once with array operations.
+
+    :param predictions: The predicted monetary values.
+    :type predictions: numpy.ndarray
+    :param thresholds: The ``[q1, q2]`` risk thresholds of the model.
+    :type thresholds: list[float]
+    :return: A dictionary with the same keys as :func:`dynamic_plan`, each
+        holding an array with one value per prediction.
+    :rtype: dict
+    """
+    predictions = np.asarray(predictions, dtype=float)
+    indices = _risk_indices(predictions, thresholds)
+    tf = np.array([DEDUCTIBLE_RATE[level] for level in RISK_LEVELS])[indices]
+    tp = np.array([CEILING_RATE[level] for level in RISK_LEVELS])[indices]
+
+    franchise = np.round(predictions * tf, 2)
+    ceiling = np.round(predictions * tp, 2)
+    refund = np.maximum(0, np.minimum(predictions - franchise, ceiling))
+
+    annual_price = refund / (1 - MARGIN)
+    monthly_price = annual_price / 12
+
+    return {
+        "prediction": predictions,
+        "risk_level": RISK_LEVELS[indices],
+        "franchise": franchise,
+        "ceiling": ceiling,
+        "refund": np.round(refund, 2),
+        "annual_price": np.round(annual_price, 2),
+        "monthly_price": np.round(monthly_price, 2)
+    }
+
+
+def dynamic_plan(prediction, thresholds):
     """
     Analyzes the risk level of a given prediction and computes financial metrics such
     as franchise, ceiling, refund, and the corresponding annual and monthly prices
@@ -53,34 +114,116 @@ def dynamic_plan(prediction):
     :param prediction: The predicted monetary value for which the dynamic plan will
                        be computed.
     :type prediction: float
+    :param thresholds: The ``[q1, q2]`` risk thresholds of the model.
+    :type thresholds: list[float]
 
     :return: A dictionary containing the input prediction, computed risk level,
              franchise amount, ceiling amount, refund amount, annual price, and
              monthly price for the dynamic plan.
     :rtype: dict
     """
-    level = get_risk_level(prediction)
-    tf = DEDUCTIBLE_RATE[level]
-    tp = CEILING_RATE[level]
+    plan = dynamic_plan_batch([prediction], thresholds)
+    return {
+        key: (str(values[0]) if key == "risk_level" else float(values[0]))
+        for key, values in plan.items()
+    }
 
-    franchise = round(prediction * tf, 2)
-    ceiling = round(prediction * tp, 2)
-    refund = max(0, min(prediction - franchise, ceiling))
 
-    annual_price = refund / (1 - MARGIN)
-    monthly_price = annual_price / 12
+def _feature(X, columns, name):
+    """
+    Returns a feature column as an array, or zeros if the model does not use it.
+    """
+    if name in columns:
+        return X[:, columns.index(name)]
+    return np.zeros(len(X))
 
-    return {
-        "prediction": prediction,
-        "risk_level": level,
-        "franchise": franchise,
-        "ceiling": ceiling,
-        "refund": round(refund, 2),
-        "annual_price": round(annual_price, 2),
-        "monthly_price": round(monthly_price, 2)
-    }
 
-def build_recommendation(prediction, model, df):
+def build_recommendations(predictions, thresholds, explainer, X, columns, top_n=3):
+    """
+    Builds the recommendation of every row of a batch at once.
+
+    The dynamic plans and risk levels are computed with array operations and
+    the SHAP values of the whole batch are obtained from a single explainer
+    call. See :func:`build_recommendation` for the content of each
+    recommendation.
+
+    :param predictions: The predictions of the model, one per row of ``X``.
+    :type predictions: numpy.ndarray
+    :param thresholds: The ``[q1, q2]`` risk thresholds of the model.
+    :type thresholds: list[float]
+    :param explainer: The cached explainer of the model used for the predictions,
+        as returned by ``model_explain.get_explainer``. When ``None``, SHAP is
+        skipped and ``top_factors`` is ``None``.
+    :type explainer: Any
+    :param X: The encoded input data, one row per client.
+    :type X: numpy.ndarray
+    :param columns: The feature names of the columns of ``X``.
+    :type columns: list[str]
+    :param top_n: The number of factors to keep, by decreasing impact. When
+        ``None``, every feature contribution is returned.
+    :type top_n: int | None
+    :return: A list of recommendations, in the order of the rows of ``X``.
+    :rtype: list[dict]
+    """
+    # 1. Calcul des plans dynamiques
+    plans = dynamic_plan_batch(predictions, thresholds)
+
+    # 2. Suggestions santé
+    is_smoker = _feature(X, columns, "smoker_yes") == 1
+    high_bmi = _feature(X, columns, "bmi") > 30
+    is_young = _feature(X, columns, "age") < 25
+
+    # 3. SHAP (top features)
+    top_indices = None
+    if explainer is not None:
+        try:
+            shap_values = np.asarray(explainer.shap_values(X))
+            top_indices = np.argsort(-np.abs(shap_values), axis=1, kind="stable")[:, :top_n]
+        except Exception:
+            pass
+
+    # 4. Construction des réponses
+    recommendations = []
+    for i in range(len(X)):
+        suggestions = []
+        if is_smoker[i]:
+            suggestions.append("The client is a smoker. Offer support to help them quit smoking.")
+        if high_bmi[i]:
+            suggestions.append("High BMI: offer nutritional support or health sports.")
+        if is_young[i]:
+            suggestions.append("Young client: consider offering the Eco Jeune plan.")
+
+        top_factors = None if explainer is None else []
+        if top_indices is not None:
+            top_factors = [
+                {
+                    "feature": columns[j],
+                    "shap_value": float(shap_values[i, j]),
+                    "value": float(X[i, j])
+                }
+                for j in top_indices[i]
+            ]
+
+        level = str(plans["risk_level"][i])
+        ceiling = float(plans["ceiling"][i])
+        recommendations.append({
+            "risk_level": level,
+            "plan": {
+                "name": level.capitalize(),
+                "franchise": float(plans["franchise"][i]),
+                "ceiling": ceiling if ceiling != float("inf") else "Infinite",
+                "refund_estimate": float(plans["refund"][i]),
+                "annual_price": float(plans["annual_price"][i]),
+                "monthly_price": float(plans["monthly_price"][i])
+            },
+            "top_factors": top_factors,
+            "suggestions": suggestions
+        })
+
+    return recommendations
+
+
+def build_recommendation(prediction, thresholds, explainer, X, columns):
     """
     Builds a personalized recommendation for a client by analyzing risk level,
     providing tailored health suggestions, highlighting influential factors using
@@ -96,55 +239,18 @@ def build_recommendation(prediction, model, df):
     :param prediction: The outcome from the machine learning model representing
         the risk prediction for the client.
     :type prediction: Any
-    :param model: The trained machine learning model used for SHAP explanations.
-    :type model: Any
-    :param df: A DataFrame containing the input data corresponding to the client,
-        with features required for analysis and SHAP evaluations.
-    :type df: pandas.DataFrame
+    :param thresholds: The ``[q1, q2]`` risk thresholds of the model.
+    :type thresholds: list[float]
+    :param explainer: The cached explainer of the model used for the prediction,
+        as returned by ``model_explain.get_explainer``.
+    :type explainer: Any
+    :param X: The encoded input data corresponding to the client, as a single
+        row matrix with the features required for analysis and SHAP evaluations.
+    :type X: numpy.ndarray
+    :param columns: The feature names of the columns of ``X``.
+    :type columns: list[str]
     :return: A dictionary containing the client's risk level, health plan details,
         the top factors determined using SHAP, and health improvement suggestions.
     :rtype: dict
     """
-    # 1. Calcul du plan dynamique
-    plan = dynamic_plan(prediction)
-    level = plan["risk_level"]
-
-    # 2. Suggestions santé
-    suggestions = []
-    if df.get("smoker_yes", [0])[0] == 1:
-        suggestions.append("The client is a smoker. Offer support to help them quit smoking.")
-    if df.get("bmi", [0])[0] > 30:
-        suggestions.append("High BMI: offer nutritional support or health sports.")
-    if df.get("age", [0])[0] < 25:
-        suggestions.append("Young client: consider offering the Eco Jeune plan.")
-
-    # 3. SHAP (top features)
-    top_factors = []
-    try:
-        explainer = shap.Explainer(model)
-        shap_values = explainer(df, check_additivity=False)
-        shap_df = pd.DataFrame({
-            "feature": df.columns,
-            "shap_value": shap_values.values[0],
-            "value": df.iloc[0].values
-        })
-        shap_df["impact"] = shap_df["shap_value"].abs()
-        top_factors = shap_df.sort_values("impact", ascending=False).head(3)[["feature", "shap_value", "value"]].to_dict(orient="records")
-    except Exception:
-        pass
-
-    # 4. Construction de la réponse
-    return {
-        "risk_level": level,
-        "plan": {
-            "name": level.capitalize(),
-            "franchise": plan["franchise"],
-            "ceiling": plan["ceiling"] if plan["ceiling"] != float("inf") else "Infinite",
-            "refund_estimate": plan["refund"],
-            "annual_price": plan["annual_price"],
-            "monthly_price": plan["monthly_price"]
-        },
-        "top_factors": top_factors,
-        "suggestions": suggestions
-    }
-
+    return build_recommendations([prediction], thresholds, explainer, X, columns)[0]
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """
+    Bounded in-process cache of prediction responses with LRU and TTL eviction.
+
+    Entries are keyed by model name and version, explanation level and
+    normalized profile, so repeated quotes of the same profile skip the model
+    and SHAP entirely, and a reloaded model never serves the responses of its
+    previous version. The least recently used entry is evicted once
+    ``max_entries`` is reached, and entries older than ``ttl`` seconds are
+    dropped on access.
+
+    :ivar max_entries: The maximum number of cached responses. ``0`` disables
+        the cache.
+    :type max_entries: int
+    :ivar ttl: The lifetime of an entry, in seconds. ``0`` means no expiry.
+    :type ttl: float
+    """
+
+    def __init__(self, max_entries=10000, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(model_name, version, profil, explain):
+        """
+        Builds the cache key of a prediction request.
+
+        :param model_name: The name of the model used for the prediction.
+        :type model_name: str
+        :param version: The version of the model, as given by ``ModelRegistry``.
+        :type version: int
+        :param profil: The profile to be predicted.
+        :type profil: AssuranceProfil
+        :param explain: The requested explanation level.
+        :type explain: Explain
+        :return: A hashable key identifying the request.
+        :rtype: tuple
+        """
+        return (
+            model_name,
+            version,
+            explain.value,
+            profil.age,
+            profil.sex.value,
+            float(profil.bmi),
+            profil.children,
+            profil.smoker,
+            profil.region.value,
+        )
+
+    def get(self, key):
+        """
+        Returns the cached response for ``key``, or ``None`` on a miss.
+
+        :param key: The key built by :meth:`make_key`.
+        :type key: tuple
+        :return: The cached response, if any and not expired.
+        :rtype: dict | None
+        """
+        if not self.max_entries:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, response = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def set(self, key, response):
+        """
+        Stores a response, evicting the least recently used entries if needed.
+
+        :param key: The key built by :meth:`make_key`.
+        :type key: tuple
+        :param response: The prediction response to cache.
+        :type response: dict
+        """
+        if not self.max_entries:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, model_name=None):
+        """
+        Drops the cached responses of a model, or of every model.
+
+        :param model_name: The model whose responses should be dropped. When
+            ``None``, the whole cache is cleared.
+        :type model_name: str | None
+        """
+        with self._lock:
+            if model_name is None:
+                self._entries.clear()
+                return
+
+            for key in [key for key in self._entries if key[0] == model_name]:
+                del self._entries[key]
+
+    def stats(self):
+        """
+        Returns the cache configuration, size and counters.
+
+        :return: A dictionary with the ``size``, ``max_entries``, ``ttl``,
+            ``hits``, ``misses``, ``evictions`` and ``expirations`` of the cache.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,7 @@
+import os
+import sys
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Les modules de l'API sont importés à plat, comme depuis le dossier api
+sys.path.insert(0, API_DIR)
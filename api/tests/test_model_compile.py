@@ -0,0 +1,100 @@
+import json
+import os
+
+import joblib
+import numpy as np
+import pytest
+
+import model_compile
+from model_compile import (
+    SPEED_ROWS, BoosterPredictor, LinearPredictor, ModelPredictor, TreeEnsemblePredictor, _baseline,
+    check_parity, compile_predictor, is_faster, parity_inputs
+)
+from model_encoder import FeatureEncoder, needs_feature_names
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+
+
+def load(model_name):
+    """
+    Loads a model of the models directory with its feature encoder.
+    """
+    model = joblib.load(os.path.join(MODELS_DIR, f"{model_name}.pkl"))
+    with open(os.path.join(MODELS_DIR, f"{model_name}_columns.json")) as f:
+        columns = json.load(f)
+    return model, FeatureEncoder(columns, needs_feature_names(model))
+
+
+@pytest.mark.parametrize("model_name", ["linear_regression", "ridge_regression"])
+def test_linear_predictor_matches_model_predict(model_name):
+    model, encoder = load(model_name)
+    X = parity_inputs(encoder, 2000, seed=42)
+
+    expected = model.predict(encoder.to_model_input(X))
+    np.testing.assert_allclose(LinearPredictor(model).predict(X), expected, rtol=1e-9)
+    np.testing.assert_allclose(LinearPredictor(model).predict(X[:1]), expected[:1], rtol=1e-9)
+
+
+@pytest.fixture
+def always_faster(monkeypatch):
+    """
+    Keeps compiled predictors whatever their timing, which is checked separately.
+    """
+    monkeypatch.setattr(model_compile, "is_faster", lambda predictor, reference, X: True)
+
+
+@pytest.mark.parametrize("model_name", ["linear_regression", "ridge_regression"])
+def test_linear_models_are_compiled(always_faster, model_name):
+    model, encoder = load(model_name)
+    assert isinstance(compile_predictor(model, encoder), LinearPredictor)
+    assert isinstance(compile_predictor(model, encoder, enabled=False), ModelPredictor)
+
+
+def test_tree_ensemble_predictor_matches_model_predict():
+    model, encoder = load("gradient_boosting")
+    X = parity_inputs(encoder, 2000, seed=42)
+    # Chaque ligne tombe exactement sur le seuil d'un noeud interne
+    splits = [
+        (feature, threshold)
+        for estimator in model.estimators_[:, 0]
+        for feature, threshold in zip(estimator.tree_.feature, estimator.tree_.threshold)
+        if feature >= 0
+    ]
+    for row, (feature, threshold) in zip(X, splits):
+        row[feature] = threshold
+
+    predictor = TreeEnsemblePredictor(model, _baseline(model))
+    expected = model.predict(encoder.to_model_input(X))
+    np.testing.assert_allclose(predictor.predict(X), expected, rtol=1e-9)
+    np.testing.assert_allclose(predictor.predict(X[:1]), expected[:1], rtol=1e-9)
+
+
+def test_gradient_boosting_is_compiled(always_faster):
+    model, encoder = load("gradient_boosting")
+    assert isinstance(compile_predictor(model, encoder), TreeEnsemblePredictor)
+
+
+def test_booster_predictor_matches_model_predict():
+    model, encoder = load("xgboost")
+    X = parity_inputs(encoder, 2000, seed=42)
+
+    predictor = BoosterPredictor(model, 1)
+    reference = ModelPredictor(model, encoder)
+    check_parity(predictor, reference, X)
+    check_parity(predictor, reference, X[:1])
+
+
+@pytest.mark.parametrize("faster", [True, False])
+def test_xgboost_is_compiled_only_when_faster(monkeypatch, faster):
+    model, encoder = load("xgboost")
+    monkeypatch.setattr(model_compile, "is_faster", lambda predictor, reference, X: faster)
+    predictor = compile_predictor(model, encoder)
+    assert isinstance(predictor, BoosterPredictor if faster else ModelPredictor)
+
+
+def test_is_faster_compares_with_model_predict():
+    model, encoder = load("linear_regression")
+    X = parity_inputs(encoder, SPEED_ROWS, seed=1)
+    reference = ModelPredictor(model, encoder)
+    assert is_faster(LinearPredictor(model), reference, X)
+    assert not is_faster(reference, reference, X)
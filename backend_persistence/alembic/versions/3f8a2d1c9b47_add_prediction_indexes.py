@@ -0,0 +1,42 @@
+"""add prediction indexes
+
+Revision ID: 3f8a2d1c9b47
+Revises: c65732c65867
+Create Date: 2026-10-17 10:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a2d1c9b47'
+down_revision: Union[str, None] = 'c65732c65867'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    'ix_prediction_created_at': ['created_at'],
+    'ix_prediction_model_id_created_at': ['model_id', 'created_at'],
+    'ix_prediction_smoker_sex_region_created_at': ['smoker', 'sex', 'region', 'created_at'],
+    'ix_prediction_age_children': ['age', 'children'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY ne peut pas tourner dans une transaction, mais évite de bloquer les écritures.
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            op.create_index(name, 'prediction', columns, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.drop_index(name, table_name='prediction', postgresql_concurrently=True, if_exists=True)
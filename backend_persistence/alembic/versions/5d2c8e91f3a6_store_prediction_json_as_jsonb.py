@@ -0,0 +1,87 @@
+"""store prediction json as jsonb
+
+Revision ID: 5d2c8e91f3a6
+Revises: 8c1e4b7f2a90
+Create Date: 2026-10-17 16:41:07.329814
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2c8e91f3a6'
+down_revision: Union[str, None] = '8c1e4b7f2a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Les chaînes existantes sont issues de json.dumps : le cast suffit comme backfill.
+    # ALTER ... TYPE réécrit la table sous verrou exclusif, à planifier sur une grosse table.
+    op.alter_column('prediction', 'suggestions',
+                    existing_type=sqlmodel.sql.sqltypes.AutoString(),
+                    type_=postgresql.JSONB(astext_type=sa.Text()),
+                    postgresql_using='suggestions::jsonb')
+    op.alter_column('prediction', 'top_factors',
+                    existing_type=sqlmodel.sql.sqltypes.AutoString(),
+                    type_=postgresql.JSONB(astext_type=sa.Text()),
+                    postgresql_using='top_factors::jsonb')
+    # NULL pour les prédictions faites sans explication (explain=none), distinctes de []
+    op.alter_column('prediction', 'top_factors',
+                    existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                    nullable=True)
+
+    op.add_column('prediction', sa.Column('ceiling_is_infinite', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.execute("UPDATE prediction SET ceiling_is_infinite = true WHERE lower(ceiling) IN ('infinite', 'inf', 'infinity')")
+    op.alter_column('prediction', 'ceiling_is_infinite', server_default=None)
+    op.alter_column('prediction', 'ceiling',
+                    existing_type=sqlmodel.sql.sqltypes.AutoString(),
+                    nullable=True)
+    op.alter_column('prediction', 'ceiling',
+                    existing_type=sqlmodel.sql.sqltypes.AutoString(),
+                    type_=sa.Float(),
+                    existing_nullable=True,
+                    postgresql_using='CASE WHEN ceiling_is_infinite THEN NULL ELSE ceiling::double precision END')
+
+    with op.get_context().autocommit_block():
+        op.create_index('ix_prediction_top_factors', 'prediction', ['top_factors'],
+                        postgresql_using='gin', postgresql_ops={'top_factors': 'jsonb_path_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_prediction_top_factor', 'prediction', [sa.text("(top_factors -> 0 ->> 'feature')")],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_prediction_top_factor', table_name='prediction', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_prediction_top_factors', table_name='prediction', postgresql_concurrently=True, if_exists=True)
+
+    op.alter_column('prediction', 'ceiling',
+                    existing_type=sa.Float(),
+                    type_=sqlmodel.sql.sqltypes.AutoString(),
+                    existing_nullable=True,
+                    postgresql_using="CASE WHEN ceiling_is_infinite THEN 'Infinite' ELSE ceiling::text END")
+    op.alter_column('prediction', 'ceiling',
+                    existing_type=sqlmodel.sql.sqltypes.AutoString(),
+                    nullable=False)
+    op.drop_column('prediction', 'ceiling_is_infinite')
+    op.execute("UPDATE prediction SET top_factors = '[]' WHERE top_factors IS NULL")
+    op.alter_column('prediction', 'top_factors',
+                    existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                    nullable=False)
+    op.alter_column('prediction', 'top_factors',
+                    existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                    type_=sqlmodel.sql.sqltypes.AutoString(),
+                    postgresql_using='top_factors::text')
+    op.alter_column('prediction', 'suggestions',
+                    existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                    type_=sqlmodel.sql.sqltypes.AutoString(),
+                    postgresql_using='suggestions::text')
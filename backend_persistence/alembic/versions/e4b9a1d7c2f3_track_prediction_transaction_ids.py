@@ -0,0 +1,43 @@
+"""track prediction transaction ids
+
+Revision ID: e4b9a1d7c2f3
+Revises: 5d2c8e91f3a6
+Create Date: 2026-10-17 18:22:45.106392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b9a1d7c2f3'
+down_revision: Union[str, None] = '5d2c8e91f3a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Défaut constant : ajout sans réécriture de la table, les lignes existantes ont xact_id = 0
+    op.add_column('prediction', sa.Column('xact_id', sa.BigInteger(), nullable=False, server_default='0'))
+    op.alter_column('prediction', 'xact_id', server_default=sa.text('pg_current_xact_id()::text::bigint'))
+    op.create_index('ix_prediction_xact_id', 'prediction', ['xact_id'])
+
+    # Le filigrane passe des ids aux transactions : le rollup est reconstruit au prochain rafraîchissement
+    op.alter_column('rollupwatermark', 'last_id', new_column_name='xact_id', type_=sa.BigInteger())
+    op.execute("DELETE FROM predictiondaily")
+    op.execute("UPDATE rollupwatermark SET xact_id = 0")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM predictiondaily")
+    op.execute("UPDATE rollupwatermark SET xact_id = 0")
+    op.alter_column('rollupwatermark', 'xact_id', new_column_name='last_id', type_=sa.Integer())
+
+    op.drop_index('ix_prediction_xact_id', table_name='prediction')
+    op.drop_column('prediction', 'xact_id')
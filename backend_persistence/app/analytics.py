@@ -0,0 +1,311 @@
+"""
+This module computes aggregate statistics over the stored predictions.
+
+It provides:
+- The dimensions the predictions can be grouped by, and the time buckets on created_at
+- A GROUP BY query returning counts, means, extremes and percentiles per group
+- The same statistics served from the PredictionDaily rollup, when the query granularity allows it
+"""
+
+from datetime import datetime, time
+from typing import List, Optional
+
+from sqlalchemy import DateTime, cast, func, union_all
+from sqlmodel import Session, select
+
+from app.models import ModelInfo, Prediction, PredictionDaily
+from app.rollup import watermark_subquery
+
+DIMENSIONS = {
+    "model_name": ModelInfo.name,
+    "region": Prediction.region,
+    "sex": Prediction.sex,
+    "smoker": Prediction.smoker,
+    "children": Prediction.children,
+    "risk_level": Prediction.risk_level,
+    "plan_name": Prediction.plan_name,
+}
+BUCKETS = ("hour", "day", "week", "month", "year")
+METRICS = ("prediction", "annual_price")
+DEFAULT_PERCENTILES = (0.5, 0.9, 0.95)
+
+ROLLUP_DIMENSIONS = ("model_name", "region", "smoker", "risk_level")
+ROLLUP_BUCKETS = ("day", "week", "month", "year")
+
+
+def _percentile_key(q: float) -> str:
+    return f"p{q * 100:g}"
+
+
+def dimension(name: str, age_band_width: int = 10):
+    """
+    Returns the SQL expression of a grouping dimension.
+
+    Args:
+        name: A key of ``DIMENSIONS``, or ``age_band`` for ages rounded down
+            to a multiple of ``age_band_width``.
+        age_band_width: The width of the age bands, in years.
+
+    Returns:
+        The labelled column expression.
+
+    Raises:
+        KeyError: If the dimension does not exist.
+    """
+    if name == "age_band":
+        return ((Prediction.age // age_band_width) * age_band_width).label(name)
+    return DIMENSIONS[name].label(name)
+
+
+def raw_stats(
+    session: Session,
+    filters,
+    group_by: List[str],
+    bucket: Optional[str] = None,
+    percentiles=DEFAULT_PERCENTILES,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    age_band_width: int = 10,
+) -> List[dict]:
+    """
+    Aggregates the ``prediction`` table with a single GROUP BY query.
+
+    Args:
+        session: The session used for the query.
+        filters: The ``PredictionFilters`` restricting the predictions.
+        group_by: The dimensions to group by, see :func:`dimension`.
+        bucket: An optional ``date_trunc`` unit of ``BUCKETS`` to group
+            ``created_at`` by.
+        percentiles: The percentiles to compute, between 0 and 1.
+        start: Only aggregates the predictions created at or after this date.
+        end: Only aggregates the predictions created before this date.
+        age_band_width: The width of the ``age_band`` dimension, in years.
+
+    Returns:
+        list: One dictionary per group, holding its dimension values, its
+        ``count``, and the ``mean``, ``min``, ``max`` and percentiles of each
+        metric of ``METRICS``.
+    """
+    keys = [dimension(name, age_band_width) for name in group_by]
+    if bucket:
+        keys.append(func.date_trunc(bucket, Prediction.created_at).label("bucket"))
+
+    aggregates = [func.count().label("count")]
+    for metric in METRICS:
+        column = getattr(Prediction, metric)
+        aggregates += [
+            func.avg(column).label(f"{metric}_mean"),
+            func.min(column).label(f"{metric}_min"),
+            func.max(column).label(f"{metric}_max"),
+        ]
+        aggregates += [
+            func.percentile_cont(q).within_group(column).label(f"{metric}_{_percentile_key(q)}")
+            for q in percentiles
+        ]
+
+    stmt = filters.apply(
+        select(*keys, *aggregates).join(ModelInfo, Prediction.model_id == ModelInfo.id)
+    )
+    if start is not None:
+        stmt = stmt.where(Prediction.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(Prediction.created_at < end)
+    if keys:
+        stmt = stmt.group_by(*keys).order_by(*keys)
+
+    groups = []
+    for row in session.exec(stmt).mappings():
+        group = {key.name: row[key.name] for key in keys}
+        group["count"] = row["count"]
+        for metric in METRICS:
+            group[metric] = {
+                stat: row[f"{metric}_{stat}"]
+                for stat in ("mean", "min", "max", *map(_percentile_key, percentiles))
+            }
+        groups.append(group)
+    return groups
+
+
+def _is_midnight(value: Optional[datetime]) -> bool:
+    return value is None or value.time() == time(0)
+
+
+def rollup_eligible(filters, group_by, bucket=None, percentiles=(), start=None, end=None) -> bool:
+    """
+    Tells whether a statistics query can be answered from the daily rollup.
+
+    The rollup holds counts, sums and extremes per day, model, region,
+    smoker and risk level: it cannot answer percentiles, hourly buckets,
+    time ranges that do not start at midnight, or groupings and filters on
+    other columns.
+    """
+    return (
+        not percentiles
+        and all(name in ROLLUP_DIMENSIONS for name in group_by)
+        and bucket in (None, *ROLLUP_BUCKETS)
+        and _is_midnight(start)
+        and _is_midnight(end)
+        and filters.sex is None
+        and filters.age_min is None
+        and filters.age_max is None
+        and filters.children_min is None
+        and filters.children_max is None
+        and filters.top_factor is None
+        and filters.factor is None
+    )
+
+
+def _rollup_aggregates(source):
+    """Aggregates of the rollup or of raw predictions, mergeable with each other."""
+    if source is PredictionDaily:
+        aggregates = [func.sum(PredictionDaily.count).label("count")]
+        for metric in METRICS:
+            aggregates += [
+                func.sum(getattr(PredictionDaily, f"{metric}_sum")).label(f"{metric}_sum"),
+                func.min(getattr(PredictionDaily, f"{metric}_min")).label(f"{metric}_min"),
+                func.max(getattr(PredictionDaily, f"{metric}_max")).label(f"{metric}_max"),
+            ]
+        return aggregates
+
+    aggregates = [func.count().label("count")]
+    for metric in METRICS:
+        column = getattr(Prediction, metric)
+        aggregates += [
+            func.sum(column).label(f"{metric}_sum"),
+            func.min(column).label(f"{metric}_min"),
+            func.max(column).label(f"{metric}_max"),
+        ]
+    return aggregates
+
+
+def rollup_stats(
+    session: Session,
+    filters,
+    group_by: List[str],
+    bucket: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[dict]:
+    """
+    Aggregates the stored predictions from the ``PredictionDaily`` rollup.
+
+    The rollup only holds the predictions up to its watermark. The more
+    recent ones are aggregated from the ``prediction`` table, which only
+    reads the rows of the transactions above the watermark, and merged in, so the result matches
+    :func:`raw_stats` without percentiles. Both halves and the watermark are
+    read by a single ``UNION ALL`` statement, hence from the same snapshot: a
+    refresh committing meanwhile cannot count a prediction twice, or miss
+    it. The query must be :func:`rollup_eligible`.
+
+    Args:
+        session: The session used for the queries.
+        filters: The ``PredictionFilters`` restricting the predictions.
+        group_by: The dimensions to group by, among ``ROLLUP_DIMENSIONS``.
+        bucket: An optional ``date_trunc`` unit of ``ROLLUP_BUCKETS``.
+        start: Only aggregates the predictions created on or after this day.
+        end: Only aggregates the predictions created before this day.
+
+    Returns:
+        list: The groups, in the format of :func:`raw_stats`.
+    """
+    rollup_keys = [
+        (ModelInfo.name if name == "model_name" else getattr(PredictionDaily, name)).label(name)
+        for name in group_by
+    ]
+    if bucket:
+        # date_trunc sur une date renvoie un timestamptz : on reste en timestamp comme created_at
+        rollup_keys.append(func.date_trunc(bucket, cast(PredictionDaily.day, DateTime)).label("bucket"))
+    rollup = select(*rollup_keys, *_rollup_aggregates(PredictionDaily)) \
+        .join(ModelInfo, PredictionDaily.model_id == ModelInfo.id)
+    if filters.model_name:
+        rollup = rollup.where(ModelInfo.name == filters.model_name)
+    if filters.smoker is not None:
+        rollup = rollup.where(PredictionDaily.smoker == filters.smoker)
+    if filters.region:
+        rollup = rollup.where(PredictionDaily.region == filters.region)
+    if start is not None:
+        rollup = rollup.where(PredictionDaily.day >= start.date())
+    if end is not None:
+        rollup = rollup.where(PredictionDaily.day < end.date())
+
+    raw_keys = [dimension(name) for name in group_by]
+    if bucket:
+        raw_keys.append(func.date_trunc(bucket, Prediction.created_at).label("bucket"))
+    recent = filters.apply(
+        select(*raw_keys, *_rollup_aggregates(Prediction))
+        .join(ModelInfo, Prediction.model_id == ModelInfo.id)
+        .where(Prediction.xact_id >= watermark_subquery())
+    )
+    if start is not None:
+        recent = recent.where(Prediction.created_at >= start)
+    if end is not None:
+        recent = recent.where(Prediction.created_at < end)
+
+    if rollup_keys:
+        rollup = rollup.group_by(*rollup_keys)
+        recent = recent.group_by(*raw_keys)
+
+    names = [key.name for key in rollup_keys]
+    merged = {}
+    for row in session.execute(union_all(rollup, recent)).mappings():
+        if not row["count"]:
+            continue
+        key = tuple(row[name] for name in names)
+        group = merged.get(key)
+        if group is None:
+            merged[key] = dict(row)
+            continue
+        group["count"] += row["count"]
+        for metric in METRICS:
+            group[f"{metric}_sum"] += row[f"{metric}_sum"]
+            group[f"{metric}_min"] = min(group[f"{metric}_min"], row[f"{metric}_min"])
+            group[f"{metric}_max"] = max(group[f"{metric}_max"], row[f"{metric}_max"])
+
+    groups = []
+    for key in sorted(merged):
+        row = merged[key]
+        group = {name: row[name] for name in names}
+        group["count"] = row["count"]
+        for metric in METRICS:
+            group[metric] = {
+                "mean": row[f"{metric}_sum"] / row["count"],
+                "min": row[f"{metric}_min"],
+                "max": row[f"{metric}_max"],
+            }
+        groups.append(group)
+    return groups
+
+
+def prediction_stats(
+    session: Session,
+    filters,
+    group_by: List[str],
+    bucket: Optional[str] = None,
+    percentiles=DEFAULT_PERCENTILES,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    age_band_width: int = 10,
+    source: str = "auto",
+) -> tuple:
+    """
+    Aggregates the stored predictions, from the daily rollup when possible.
+
+    Args:
+        source: ``rollup`` or ``raw`` to force a source, or ``auto`` to use
+            the rollup whenever the query is :func:`rollup_eligible`.
+
+    See :func:`raw_stats` for the other arguments.
+
+    Returns:
+        tuple: The groups, and the source they were computed from.
+
+    Raises:
+        ValueError: If ``source`` is ``rollup`` and the query is not eligible.
+    """
+    eligible = rollup_eligible(filters, group_by, bucket, percentiles, start, end)
+    if source == "rollup" and not eligible:
+        raise ValueError("This query cannot be answered from the daily rollup")
+
+    if source != "raw" and eligible:
+        return rollup_stats(session, filters, group_by, bucket, start, end), "rollup"
+    return raw_stats(session, filters, group_by, bucket, percentiles, start, end, age_band_width), "raw"
@@ -1,42 +1,58 @@
+import asyncio
+import base64
 import json
 import math
-from typing import Optional, Dict, Any
+import os
+from datetime import datetime
+from typing import Optional, Dict, Any, List
 
-from fastapi import APIRouter, Depends, HTTPException, Body, Query
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import func, tuple_
 from sqlmodel import Session, select
-from app.database import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database import get_session, get_async_session, get_engine, DATABASE_ASYNC
 from app.models import ModelInfo, Prediction
-from app.schemas import AssuranceProfil, PredictionResponse
+from app.schemas import AssuranceProfil, PredictionResponse, PredictionRecord
+from app.analytics import BUCKETS, DEFAULT_PERCENTILES, DIMENSIONS, prediction_stats
+from app.export import export_statement, iter_batches, to_csv, to_ndjson
+from app.model_ids import model_ids
+from app.counts import count_cache, estimate_count, exact_count
+from app.ingest import prediction_writer, copy_predictions, insert_predictions, QueueFull, WAIT_TIMEOUT
+from app.seed.seed import seed_status
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "5000"))
+HISTORY_MAX_LIMIT = int(os.getenv("HISTORY_MAX_LIMIT", "100"))
+PERCENTILES_NONE = "none"
 
 router = APIRouter()
 
+@router.get("/ready")
+def readiness():
+    """
+    Reports whether the models are seeded, with a 503 status until they are.
+    """
+    return JSONResponse(seed_status.stats(), status_code=200 if seed_status.ready else 503)
+
 @router.post("/models/")
 def create_model(name: str, session: Session = Depends(get_session)):
     model = ModelInfo(name=name)
     session.add(model)
     session.commit()
+    model_ids.invalidate()
     return model
 
 @router.get("/models/")
 def list_models(session: Session = Depends(get_session)):
     return session.exec(select(ModelInfo)).all()
 
-@router.post("/predictions/")
-def create_prediction(
-    profil: AssuranceProfil = Body(...),
-    response: PredictionResponse = Body(...),
-    model_name: str = Body(...),
-    session: Session = Depends(get_session)
-):
-    model = session.exec(
-        select(ModelInfo).where(ModelInfo.name == model_name)
-    ).first()
-
-    if not model:
-        raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found")
-
-    record = Prediction(
+def prediction_values(profil: AssuranceProfil, response: PredictionResponse, model_id: int) -> Dict[str, Any]:
+    """
+    Flattens a profile and its prediction response into ``Prediction`` column values.
+    """
+    return dict(
         nom=profil.nom,
         prenom=profil.prenom,
         age=profil.age,
@@ -52,85 +68,538 @@ def create_prediction(
         risk_level=response.risk_level,
         plan_name=response.plan.name,
         franchise=response.plan.franchise,
-        ceiling=str(response.plan.ceiling),
+        ceiling=None if response.plan.ceiling == "Infinite" else response.plan.ceiling,
+        ceiling_is_infinite=response.plan.ceiling == "Infinite",
         refund_estimate=response.plan.refund_estimate,
         annual_price=response.plan.annual_price,
         monthly_price=response.plan.monthly_price,
-        suggestions=json.dumps(response.suggestions),
-        top_factors=json.dumps([f.model_dump() for f in response.top_factors]),
-        model_id=model.id
+        suggestions=response.suggestions,
+        top_factors=None if response.top_factors is None else [f.model_dump() for f in response.top_factors],
+        created_at=datetime.utcnow(),
+        model_id=model_id
     )
-    session.add(record)
+
+def resolve_model_id(session: Session, model_name: str) -> int:
+    """
+    Returns the id of a model from its name, from the cache when possible.
+
+    Raises:
+        HTTPException: 404 if the model does not exist.
+    """
+    model_id = model_ids.resolve(session, model_name)
+    if model_id is None:
+        raise HTTPException(status_code=404, detail=f"Model '{model_name}' not found")
+    return model_id
+
+def store_prediction(session: Session, values: Dict[str, Any]) -> int:
+    """
+    Inserts a prediction and commits it, with a single INSERT ... RETURNING.
+
+    Returns:
+        int: The id of the new prediction.
+    """
+    prediction_id, = insert_predictions(session, [values])
     session.commit()
-    session.refresh(record)
-    return {"id": record.id}
+    return prediction_id
 
-@router.get("/predictions/")
-def list_predictions(
-    page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1),
-    model_name: Optional[str] = Query(None),
-    sex: Optional[str] = Query(None, regex="^(male|female)$"),
-    smoker: Optional[bool] = Query(None),
-    region: Optional[str] = Query(None),
-    age_min: Optional[int] = Query(None, ge=0),
-    age_max: Optional[int] = Query(None, ge=0),
-    children_min: Optional[int] = Query(None, ge=0),
-    children_max: Optional[int] = Query(None, ge=0),
+def enqueue_prediction(values: Dict[str, Any]):
+    """
+    Queues a prediction for the write-behind writer.
+
+    Returns:
+        Future: Resolved with the id of the prediction once it is committed.
+
+    Raises:
+        HTTPException: 503 with a ``Retry-After`` header if the queue is full
+            or the writer is shutting down.
+    """
+    try:
+        return prediction_writer.submit(values)
+    except (QueueFull, RuntimeError) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+def wait_timeout() -> HTTPException:
+    return HTTPException(
+        status_code=504,
+        detail=f"Prediction still queued after {WAIT_TIMEOUT}s, it will be written later"
+    )
+
+def queued_response() -> JSONResponse:
+    return JSONResponse(status_code=202, content={"id": None, "status": "queued"})
+
+def create_prediction(
+    profil: AssuranceProfil = Body(...),
+    response: PredictionResponse = Body(...),
+    model_name: str = Body(...),
+    wait: bool = Query(False),
+    session: Session = Depends(get_session)
+):
+    """
+    Stores a prediction, or queues it when the write-behind writer is running.
+    """
+    values = prediction_values(profil, response, resolve_model_id(session, model_name))
+
+    # Write-behind : mise en file, écriture groupée par le writer en arrière-plan
+    if prediction_writer.running:
+        future = enqueue_prediction(values)
+        if not wait:
+            return queued_response()
+        try:
+            return {"id": future.result(timeout=WAIT_TIMEOUT)}
+        except TimeoutError:
+            raise wait_timeout()
+
+    return {"id": store_prediction(session, values)}
+
+async def create_prediction_async(
+    profil: AssuranceProfil = Body(...),
+    response: PredictionResponse = Body(...),
+    model_name: str = Body(...),
+    wait: bool = Query(False),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    Stores a prediction on the async engine, or queues it when the write-behind writer is running.
+    """
+    model_id = await session.run_sync(resolve_model_id, model_name)
+    values = prediction_values(profil, response, model_id)
+
+    if prediction_writer.running:
+        future = await run_in_threadpool(enqueue_prediction, values)
+        if not wait:
+            return queued_response()
+        try:
+            return {"id": await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), WAIT_TIMEOUT)}
+        except TimeoutError:
+            raise wait_timeout()
+
+    return {"id": await session.run_sync(store_prediction, values)}
+
+router.post("/predictions/")(create_prediction_async if DATABASE_ASYNC else create_prediction)
+
+def _load_records(records: list) -> list:
+    """
+    Validates a chunk of bulk records and loads the valid ones with COPY.
+
+    Model names are resolved to ids from the cache, with at most one query
+    for the whole chunk.
+
+    Args:
+        records: ``(index, raw_record)`` pairs, where ``raw_record`` is the
+            decoded JSON of a ``PredictionRecord``.
+
+    Returns:
+        list: One ``{"index", "id"}`` or ``{"index", "error"}`` result per record.
+    """
+    results = []
+    valid = []
+    for index, raw in records:
+        try:
+            valid.append((index, PredictionRecord.model_validate(raw)))
+        except ValidationError as e:
+            results.append({"index": index, "error": str(e)})
+
+    with Session(get_engine()) as session:
+        ids_by_name = model_ids.resolve_many(session, {record.model_name for _, record in valid})
+
+        rows = []
+        indices = []
+        for index, record in valid:
+            model_id = ids_by_name.get(record.model_name)
+            if model_id is None:
+                results.append({"index": index, "error": f"Model '{record.model_name}' not found"})
+                continue
+            rows.append(prediction_values(record.profil, record.response, model_id))
+            indices.append(index)
+
+        ids = copy_predictions(session, rows)
+        session.commit()
+
+    results.extend({"index": index, "id": row_id} for index, row_id in zip(indices, ids))
+    return results
+
+@router.post("/predictions/bulk")
+async def create_predictions_bulk(request: Request):
+    """
+    Stores many predictions at once, from a JSON array or an NDJSON stream.
+
+    Each record holds a ``profil``, its prediction ``response`` and the
+    ``model_name``, like the body of ``POST /predictions/``. NDJSON bodies
+    (``Content-Type: application/x-ndjson``) are read as a stream and loaded
+    in chunks of ``BULK_CHUNK_SIZE`` records, so their size is not bounded by
+    memory. Each chunk is committed on its own. Invalid records do not abort
+    the load: they are reported with their error.
+
+    Returns:
+        dict: The number of ``inserted`` rows and one ``{"index", "id"}`` or
+        ``{"index", "error"}`` result per record, in input order.
+    """
+    results = []
+
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        chunk = []
+        index = 0
+        pending = b""
+        async for data in request.stream():
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    chunk.append((index, json.loads(line)))
+                except ValueError as e:
+                    results.append({"index": index, "error": f"Invalid JSON: {e}"})
+                index += 1
+                if len(chunk) >= BULK_CHUNK_SIZE:
+                    results.extend(await run_in_threadpool(_load_records, chunk))
+                    chunk = []
+        if pending.strip():
+            try:
+                chunk.append((index, json.loads(pending)))
+            except ValueError as e:
+                results.append({"index": index, "error": f"Invalid JSON: {e}"})
+        if chunk:
+            results.extend(await run_in_threadpool(_load_records, chunk))
+    else:
+        try:
+            records = json.loads(await request.body())
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+        if not isinstance(records, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of records")
+        for start in range(0, len(records), BULK_CHUNK_SIZE):
+            chunk = list(enumerate(records[start:start + BULK_CHUNK_SIZE], start))
+            results.extend(await run_in_threadpool(_load_records, chunk))
+
+    results.sort(key=lambda result: result["index"])
+    return {
+        "inserted": sum(1 for result in results if "id" in result),
+        "results": results
+    }
+
+@router.get("/predictions/ingest/stats")
+def ingest_stats():
+    return prediction_writer.stats()
+
+class PredictionFilters:
+    """
+    Query filters shared by the prediction history endpoints.
+
+    ``top_factor`` keeps the predictions whose main factor is the given
+    feature, ``factor`` the predictions having it among their top factors.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = Query(None),
+        sex: Optional[str] = Query(None, regex="^(male|female)$"),
+        smoker: Optional[bool] = Query(None),
+        region: Optional[str] = Query(None),
+        age_min: Optional[int] = Query(None, ge=0),
+        age_max: Optional[int] = Query(None, ge=0),
+        children_min: Optional[int] = Query(None, ge=0),
+        children_max: Optional[int] = Query(None, ge=0),
+        top_factor: Optional[str] = Query(None),
+        factor: Optional[str] = Query(None),
+    ):
+        self.model_name = model_name
+        self.sex = sex
+        self.smoker = smoker
+        self.region = region
+        self.age_min = age_min
+        self.age_max = age_max
+        self.children_min = children_min
+        self.children_max = children_max
+        self.top_factor = top_factor
+        self.factor = factor
+
+    def apply(self, stmt):
+        """
+        Adds the filters to a statement selecting from ``Prediction`` joined with ``ModelInfo``.
+        """
+        if self.model_name:
+            # Sous-requête scalaire plutôt que filtre sur la jointure : le planner utilise alors
+            # l'index (model_id, created_at) au lieu d'estimer la sélectivité du nom
+            stmt = stmt.where(Prediction.model_id == (
+                select(ModelInfo.id).where(ModelInfo.name == self.model_name).scalar_subquery()
+            ))
+        if self.sex:
+            stmt = stmt.where(Prediction.sex == self.sex)
+        if self.smoker is not None:
+            stmt = stmt.where(Prediction.smoker == self.smoker)
+        if self.region:
+            stmt = stmt.where(Prediction.region == self.region)
+        if self.age_min is not None:
+            stmt = stmt.where(Prediction.age >= self.age_min)
+        if self.age_max is not None:
+            stmt = stmt.where(Prediction.age <= self.age_max)
+        if self.children_min is not None:
+            stmt = stmt.where(Prediction.children >= self.children_min)
+        if self.children_max is not None:
+            stmt = stmt.where(Prediction.children <= self.children_max)
+        # Facteur principal (index sur top_factors->0->>'feature') ou parmi les facteurs (index GIN)
+        if self.top_factor:
+            stmt = stmt.where(Prediction.top_factors[0]["feature"].astext == self.top_factor)
+        if self.factor:
+            stmt = stmt.where(Prediction.top_factors.contains(
+                func.jsonb_build_array(func.jsonb_build_object("feature", self.factor))
+            ))
+        return stmt
+
+    def key(self) -> tuple:
+        """
+        Returns the filter values as a hashable key.
+        """
+        return (
+            self.model_name, self.sex, self.smoker, self.region,
+            self.age_min, self.age_max, self.children_min, self.children_max,
+            self.top_factor, self.factor
+        )
+
+def encode_cursor(created_at: datetime, prediction_id: int) -> str:
+    """
+    Builds the opaque cursor pointing after a prediction of the history.
+    """
+    payload = json.dumps([created_at.isoformat(), prediction_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Reads the ``(created_at, id)`` position stored in a cursor.
+
+    Raises:
+        HTTPException: 400 if the cursor was not built by ``encode_cursor``.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, prediction_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), int(prediction_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _history_item(pred: Prediction, mdl_name: str) -> Dict[str, Any]:
+    data = pred.model_dump(exclude={"xact_id"})
+    data["model_name"] = mdl_name
+    return data
+
+def parse_percentiles(values: Optional[List[str]], source: str) -> List[float]:
+    """
+    Reads the ``percentiles`` query parameter of the statistics endpoint.
+
+    A list cannot be sent empty in a query string, so ``none`` stands for no
+    percentile, which lets ``source=auto`` queries reach the rollup.
+
+    Raises:
+        HTTPException: 400 if a value is neither ``none`` nor a number between 0 and 1.
+    """
+    if values is None:
+        # Le rollup ne stocke pas de percentiles : on ne les demande pas par défaut
+        return [] if source == "rollup" else list(DEFAULT_PERCENTILES)
+    if values == [PERCENTILES_NONE]:
+        return []
+    try:
+        percentiles = [float(value) for value in values]
+    except ValueError:
+        percentiles = None
+    if percentiles is None or any(not 0 <= q <= 1 for q in percentiles):
+        raise HTTPException(status_code=400, detail="Percentiles must be between 0 and 1, or none")
+    return percentiles
+
+@router.get("/predictions/stats")
+def get_prediction_stats(
+    group_by: List[str] = Query([]),
+    bucket: Optional[str] = Query(None, regex=f"^({'|'.join(BUCKETS)})$"),
+    percentiles: Optional[List[str]] = Query(None),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    age_band_width: int = Query(10, ge=1),
+    source: str = Query("auto", regex="^(auto|rollup|raw)$"),
+    filters: PredictionFilters = Depends(),
     session: Session = Depends(get_session)
 ) -> Dict[str, Any]:
-    # 1) Base select avec jointure
-    stmt = select(Prediction, ModelInfo.name.label("model_name")) \
+    """
+    Aggregates the stored predictions in the database.
+
+    Predictions are grouped by the ``group_by`` dimensions (``model_name``,
+    ``region``, ``sex``, ``smoker``, ``children``, ``risk_level``,
+    ``plan_name`` or ``age_band``) and, when ``bucket`` is given, by
+    ``created_at`` truncated to that unit. Each group holds its ``count``
+    and the mean, min, max and ``percentiles`` of ``prediction`` and
+    ``annual_price``. The filters of ``GET /predictions/`` apply.
+
+    ``percentiles`` defaults to ``DEFAULT_PERCENTILES``, or to none with
+    ``source=rollup``; ``percentiles=none`` computes none. Queries without
+    percentiles, grouped and filtered only on ``model_name``, ``region``,
+    ``smoker`` and ``risk_level``, with day-aligned buckets and bounds, are
+    served from the daily rollup unless ``source=raw``.
+
+    Raises:
+        HTTPException: 400 if a dimension or a percentile is invalid, or if
+            ``source=rollup`` is asked for a query the rollup cannot answer.
+    """
+    unknown = [name for name in group_by if name not in DIMENSIONS and name != "age_band"]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown dimensions: {unknown}")
+    percentiles = parse_percentiles(percentiles, source)
+
+    try:
+        groups, source = prediction_stats(
+            session, filters, group_by, bucket, percentiles, start, end, age_band_width, source
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "group_by": group_by,
+        "bucket": bucket,
+        "source": source,
+        "groups": groups
+    }
+
+@router.get("/predictions/export")
+def export_predictions(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    filters: PredictionFilters = Depends()
+) -> StreamingResponse:
+    """
+    Streams the stored predictions as NDJSON or CSV, in id order.
+
+    Rows are read through a server-side cursor and sent batch by batch, so
+    the memory used does not depend on the size of the export. The filters
+    of ``GET /predictions/`` apply, along with a ``[start, end)`` range on
+    ``created_at``.
+    """
+    batches = iter_batches(export_statement(filters, start, end))
+    if format == "csv":
+        return StreamingResponse(
+            to_csv(batches),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="predictions.csv"'}
+        )
+    return StreamingResponse(to_ndjson(batches), media_type="application/x-ndjson")
+
+def history_page(
+    session: Session,
+    page: int,
+    limit: int,
+    cursor: Optional[str],
+    count: str,
+    filters: PredictionFilters
+) -> Dict[str, Any]:
+    """
+    Lists stored predictions, most recent first.
+
+    Two pagination modes are available. By default, ``page`` and ``limit``
+    select a page by offset, and the response holds the ``total`` number of
+    matching predictions and of ``pages``. When ``cursor`` is given (empty for
+    the first page), the history is paged on ``(created_at, id)`` instead: each
+    page costs the same whatever its depth, and the response holds the
+    ``next_cursor`` to pass for the following page, ``None`` on the last one.
+    In cursor mode, ``limit`` is clamped to ``HISTORY_MAX_LIMIT``; offset
+    mode keeps accepting any page size, as before cursors were added.
+
+    In offset mode, ``count`` chooses how ``total`` is computed: ``exact``
+    runs a COUNT(*) of the filtered history, ``estimate`` reads the planner
+    estimate, ``cached`` reuses an exact count for a few seconds, and
+    ``none`` skips it, leaving ``total`` and ``pages`` to ``None``.
+    ``total_exact`` tells whether ``total`` is an up-to-date exact count.
+
+    Raises:
+        HTTPException: 400 if the cursor is invalid.
+    """
+    # 1) Base select avec jointure et filtres
+    stmt = filters.apply(
+        select(Prediction, ModelInfo.name.label("model_name"))
         .join(ModelInfo, Prediction.model_id == ModelInfo.id)
+    )
+
+    # 2) Pagination par curseur : on reprend après le dernier (created_at, id) renvoyé
+    if cursor is not None:
+        limit = min(limit, HISTORY_MAX_LIMIT)
+        if cursor:
+            created_at, prediction_id = decode_cursor(cursor)
+            # La première condition seule est indexable, la seconde départage les created_at égaux
+            stmt = stmt.where(
+                Prediction.created_at <= created_at,
+                tuple_(Prediction.created_at, Prediction.id) < tuple_(created_at, prediction_id)
+            )
+
+        rows = session.exec(
+            stmt.order_by(Prediction.created_at.desc(), Prediction.id.desc())
+                .limit(limit + 1)
+        ).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1][0]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        return {
+            "items": [_history_item(pred, mdl_name) for pred, mdl_name in rows],
+            "limit": limit,
+            "next_cursor": next_cursor
+        }
 
-    # 2) Filtre par nom de modèle
-    if model_name:
-        stmt = stmt.where(ModelInfo.name == model_name)
-
-    # 3) Autres filtres
-    if sex:
-        stmt = stmt.where(Prediction.sex == sex)
-    if smoker is not None:
-        stmt = stmt.where(Prediction.smoker == smoker)
-    if region:
-        stmt = stmt.where(Prediction.region == region)
-    if age_min is not None:
-        stmt = stmt.where(Prediction.age >= age_min)
-    if age_max is not None:
-        stmt = stmt.where(Prediction.age <= age_max)
-    if children_min is not None:
-        stmt = stmt.where(Prediction.children >= children_min)
-    if children_max is not None:
-        stmt = stmt.where(Prediction.children <= children_max)
-
-    # 4) Comptage total sur la même sous-requête
-    total = session.exec(
-        select(func.count())
-        .select_from(stmt.subquery())
-    ).one()
-
-    # 5) Pagination
-    pages = math.ceil(total / limit)
+    # 3) Comptage total sur la même sous-requête, exact, estimé ou en cache
+    if count == "exact":
+        total = exact_count(session, stmt)
+    elif count == "estimate":
+        total = estimate_count(session, stmt)
+    elif count == "cached":
+        total = count_cache.count(session, stmt, filters.key())
+    else:
+        total = None
+
+    # 4) Pagination
+    pages = math.ceil(total / limit) if total is not None else None
     offset = (page - 1) * limit
 
-    # 6) Exécution finale avec ordre, offset, limit
+    # 5) Exécution finale avec ordre, offset, limit
     rows = session.exec(
         stmt.order_by(Prediction.created_at.desc())
             .offset(offset)
             .limit(limit)
     ).all()
 
-    # 7) Construction de la liste d'items intégrant model_name
-    items = []
-    for pred, mdl_name in rows:
-        data = pred.model_dump()  # ou .dict() selon ta version
-        data["model_name"] = mdl_name
-        items.append(data)
+    # 6) Construction de la liste d'items intégrant model_name
+    items = [_history_item(pred, mdl_name) for pred, mdl_name in rows]
 
     return {
         "items": items,
         "total": total,
+        "total_exact": count == "exact",
         "page": page,
         "pages": pages,
         "limit": limit
     }
+
+def list_predictions(
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1),
+    cursor: Optional[str] = Query(None),
+    count: str = Query("exact", regex="^(exact|estimate|cached|none)$"),
+    filters: PredictionFilters = Depends(),
+    session: Session = Depends(get_session)
+) -> Dict[str, Any]:
+    """
+    Lists stored predictions, most recent first. See ``history_page``.
+    """
+    return history_page(session, page, limit, cursor, count, filters)
+
+async def list_predictions_async(
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1),
+    cursor: Optional[str] = Query(None),
+    count: str = Query("exact", regex="^(exact|estimate|cached|none)$"),
+    filters: PredictionFilters = Depends(),
+    session: AsyncSession = Depends(get_async_session)
+) -> Dict[str, Any]:
+    """
+    Lists stored predictions, most recent first, on the async engine. See ``history_page``.
+    """
+    return await session.run_sync(history_page, page, limit, cursor, count, filters)
+
+router.get("/predictions/")(list_predictions_async if DATABASE_ASYNC else list_predictions)
@@ -0,0 +1,127 @@
+"""
+This module provides cheaper alternatives to an exact COUNT(*) of the prediction history.
+
+It provides:
+- Row count estimates read from the PostgreSQL query planner
+- A short-lived in-process cache of exact counts, keyed by filter set
+"""
+
+import json
+import os
+import threading
+import time
+
+from sqlalchemy import func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlmodel import Session, select
+
+COUNT_CACHE_TTL = float(os.getenv("HISTORY_COUNT_TTL", "30"))
+COUNT_CACHE_SIZE = int(os.getenv("HISTORY_COUNT_CACHE_SIZE", "1000"))
+
+
+class Explain(Executable, ClauseElement):
+    """
+    ``EXPLAIN (FORMAT JSON)`` of a statement, keeping its bind parameters.
+
+    The filter values are sent as parameters of the EXPLAIN, so they are
+    never rendered into the SQL text.
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement, analyze: bool = False):
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    options = "ANALYZE, FORMAT JSON" if element.analyze else "FORMAT JSON"
+    return f"EXPLAIN ({options}) " + compiler.process(element.statement, **kw)
+
+
+def exact_count(session: Session, stmt) -> int:
+    """
+    Counts the rows returned by a statement.
+
+    Args:
+        session: The session used for the query.
+        stmt: The filtered select statement.
+
+    Returns:
+        int: The exact number of rows.
+    """
+    return session.exec(select(func.count()).select_from(stmt.subquery())).one()
+
+
+def estimate_count(session: Session, stmt) -> int:
+    """
+    Estimates the rows returned by a statement from the planner statistics.
+
+    The statement is only planned, never executed, so the cost does not grow
+    with the table. The estimate is as good as the statistics gathered by
+    ``ANALYZE`` and can be far off on correlated filters.
+
+    Args:
+        session: The session used for the query.
+        stmt: The filtered select statement.
+
+    Returns:
+        int: The estimated number of rows.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return exact_count(session, stmt)
+
+    plan = session.execute(Explain(stmt)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class CountCache:
+    """
+    Exact counts kept for ``ttl`` seconds, keyed by filter set.
+
+    Counts may lag behind the table by up to ``ttl`` seconds. The oldest
+    entry is dropped once ``max_entries`` is reached.
+    """
+
+    def __init__(self, ttl: float = COUNT_CACHE_TTL, max_entries: int = COUNT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def count(self, session: Session, stmt, key: tuple) -> int:
+        """
+        Returns the cached count of ``key``, counting ``stmt`` on a miss.
+
+        Args:
+            session: The session used on a miss.
+            stmt: The filtered select statement.
+            key: The hashable filter set identifying ``stmt``.
+
+        Returns:
+            int: The exact count, at most ``ttl`` seconds old.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and now - entry[0] <= self.ttl:
+            return entry[1]
+
+        total = exact_count(session, stmt)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (now, total)
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        return total
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+count_cache = CountCache()
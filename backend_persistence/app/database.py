@@ -3,31 +3,91 @@ This module handles database connection configuration and session management.
 
 It provides:
 - Database engine configuration using environment variables
+- Connection pool, pre-ping, statement timeout and SQL echo settings
 - Session management utilities for database operations
+- An optional asyncpg engine and AsyncSession dependency for the async routes
 - Global engine instance accessible throughout the application
 """
 
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL, echo=True)
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
+
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# En millisecondes, 0 pour ne pas limiter la durée des requêtes
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", "0"))
+
+POOL_OPTIONS = dict(
+    echo=DB_ECHO,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+
+def _connect_args():
+    if not DB_STATEMENT_TIMEOUT:
+        return {}
+    return {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"}
+
+def _async_connect_args():
+    if not DB_STATEMENT_TIMEOUT:
+        return {}
+    return {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT)}}
+
+def async_database_url(url: str) -> str:
+    """
+    Converts a PostgreSQL URL to the asyncpg driver.
+
+    Args:
+        url: The database URL, with or without an explicit sync driver.
+
+    Returns:
+        str: The same URL using ``postgresql+asyncpg``.
+    """
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+engine = create_engine(DATABASE_URL, connect_args=_connect_args(), **POOL_OPTIONS)
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL), connect_args=_async_connect_args(), **POOL_OPTIONS
+) if DATABASE_ASYNC else None
 
 def get_session():
     """
     Creates and yields a database session using the configured engine.
-    
+
     Yields:
         Session: A SQLModel session object for database operations.
     """
     with Session(engine) as session:
         yield session
 
+async def get_async_session():
+    """
+    Creates and yields an async database session using the asyncpg engine.
+
+    Yields:
+        AsyncSession: A SQLModel async session object for database operations.
+    """
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
 def get_engine():
     """
     Returns the global database engine instance.
-    
+
     Returns:
         Engine: SQLModel engine configured with DATABASE_URL.
     """
-    return engine
\ No newline at end of file
+    return engine
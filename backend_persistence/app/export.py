@@ -0,0 +1,107 @@
+"""
+This module streams the stored predictions out of the database for exports.
+
+It provides:
+- Batches of prediction rows read through a server-side cursor, joined with their model name
+- NDJSON and CSV encoders turning these batches into chunks of text
+"""
+
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from typing import Iterator, Optional
+
+from sqlmodel import Session, select
+
+from app.database import get_engine
+from app.models import ModelInfo, Prediction
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+# xact_id ne sert qu'aux lectures incrémentales, il n'est pas exporté
+PREDICTION_COLUMNS = [column for column in Prediction.__table__.columns if column.name != "xact_id"]
+EXPORT_COLUMNS = [column.name for column in PREDICTION_COLUMNS] + ["model_name"]
+
+
+def export_statement(filters=None, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """
+    Builds the statement selecting the exported predictions, in id order.
+
+    Args:
+        filters: The optional ``PredictionFilters`` restricting the predictions.
+        start: Only exports the predictions created at or after this date.
+        end: Only exports the predictions created before this date.
+    """
+    stmt = select(*PREDICTION_COLUMNS, ModelInfo.name.label("model_name")) \
+        .join(ModelInfo, Prediction.model_id == ModelInfo.id)
+    if filters is not None:
+        stmt = filters.apply(stmt)
+    if start is not None:
+        stmt = stmt.where(Prediction.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(Prediction.created_at < end)
+    return stmt.order_by(Prediction.id)
+
+
+def iter_batches(stmt, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list]:
+    """
+    Runs a statement through a server-side cursor and yields its rows in batches.
+
+    Only one batch is held in memory at a time, whatever the size of the
+    result. The session is opened and closed by the generator itself, so it
+    can be consumed after the request handler returned.
+
+    Args:
+        stmt: The select statement to run.
+        batch_size: The number of rows fetched from the cursor at a time.
+
+    Yields:
+        list: The rows of each batch, as mappings.
+    """
+    with Session(get_engine()) as session:
+        result = session.execute(stmt.execution_options(yield_per=batch_size))
+        for partition in result.mappings().partitions():
+            yield partition
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def to_ndjson(batches: Iterator[list]) -> Iterator[str]:
+    """
+    Encodes batches of rows as NDJSON, one chunk of lines per batch.
+    """
+    for batch in batches:
+        yield "".join(json.dumps(dict(row), default=_json_default) + "\n" for row in batch)
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def to_csv(batches: Iterator[list]) -> Iterator[str]:
+    """
+    Encodes batches of rows as CSV with a header line, one chunk per batch.
+
+    JSON columns are written as JSON text.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in batch:
+            writer.writerow([_csv_value(row[column]) for column in EXPORT_COLUMNS])
+        yield buffer.getvalue()
@@ -0,0 +1,256 @@
+"""
+This module implements the write-behind ingestion path for predictions.
+
+It provides:
+- A bounded in-memory queue of prediction rows waiting to be written
+- A background writer flushing the queue in bulk, on a size or time trigger
+- Futures letting callers wait for their row to be durable when they need to
+- A flush-on-shutdown hook called from the application lifespan
+- Bulk loading of prediction rows with PostgreSQL COPY
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from sqlalchemy import insert, text
+from sqlmodel import Session
+
+from app.database import get_engine
+from app.models import Prediction
+
+WRITE_BEHIND = os.getenv("PREDICTION_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+QUEUE_SIZE = int(os.getenv("PREDICTION_QUEUE_SIZE", "10000"))
+BATCH_SIZE = int(os.getenv("PREDICTION_BATCH_SIZE", "500"))
+FLUSH_INTERVAL = float(os.getenv("PREDICTION_FLUSH_INTERVAL", "0.5"))
+ENQUEUE_TIMEOUT = float(os.getenv("PREDICTION_ENQUEUE_TIMEOUT", "1"))
+WAIT_TIMEOUT = float(os.getenv("PREDICTION_WAIT_TIMEOUT", "10"))
+
+COPY_NULL = "\\N"
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when the ingestion queue stays full for longer than the enqueue timeout."""
+
+
+def insert_predictions(session: Session, rows: list) -> list:
+    """
+    Inserts prediction rows with a single multi-row INSERT ... RETURNING.
+
+    Args:
+        session: The session used for the insert. It is not committed.
+        rows: The column values of each prediction, as dictionaries.
+
+    Returns:
+        list: The ids of the inserted rows, in the order of ``rows``.
+    """
+    if not rows:
+        return []
+    stmt = insert(Prediction).returning(Prediction.id, sort_by_parameter_order=True)
+    return list(session.scalars(stmt, rows))
+
+
+def _copy_value(value):
+    """Formats a column value for the CSV stream of ``COPY``."""
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def copy_predictions(session: Session, rows: list) -> list:
+    """
+    Loads prediction rows with PostgreSQL ``COPY``, falling back to a bulk INSERT.
+
+    ``COPY`` does not return the generated ids, so they are drawn from the
+    ``prediction`` id sequence first and written along with the rows.
+
+    Args:
+        session: The session used for the load. It is not committed.
+        rows: The column values of each prediction, as dictionaries.
+
+    Returns:
+        list: The ids of the loaded rows, in the order of ``rows``.
+    """
+    if not rows:
+        return []
+    if session.get_bind().dialect.driver != "psycopg2":
+        return insert_predictions(session, rows)
+
+    ids = list(session.scalars(
+        text("SELECT nextval(pg_get_serial_sequence('prediction', 'id')) FROM generate_series(1, :n)"),
+        {"n": len(rows)}
+    ))
+
+    # Les colonnes à défaut serveur (xact_id) sont laissées à la base
+    columns = [column.name for column in Prediction.__table__.columns if column.server_default is None]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row_id, row in zip(ids, rows):
+        values = (row_id if name == "id" else row.get(name) for name in columns)
+        writer.writerow([_copy_value(value) for value in values])
+    buffer.seek(0)
+
+    cursor = session.connection().connection.cursor()
+    cursor.copy_expert(
+        f"COPY prediction ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')",
+        buffer
+    )
+    return ids
+
+
+class PredictionWriter:
+    """
+    Background writer persisting queued predictions in bulk.
+
+    Rows are accepted into a bounded queue and written by a single thread,
+    up to ``batch_size`` rows per INSERT, as soon as a batch is full or
+    ``flush_interval`` seconds after its first row. When the queue is full,
+    :meth:`submit` blocks up to ``enqueue_timeout`` seconds, then raises
+    :class:`QueueFull` so the caller can push back on its client.
+
+    Rows are queued under a lock that :meth:`stop` also takes to raise its
+    flag, so no row can be queued after the final drain has started. Rows
+    of a failed flush are counted in ``dropped``, since fire-and-forget
+    callers never see the error.
+    """
+
+    def __init__(self, engine=None, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, enqueue_timeout=ENQUEUE_TIMEOUT):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stopping = threading.Event()
+        self._submit_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Starts the background writer thread."""
+        if self.running:
+            return
+        if self.engine is None:
+            self.engine = get_engine()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="prediction-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30):
+        """
+        Stops accepting rows and flushes everything still queued.
+
+        Args:
+            timeout: Maximum time to wait for the final flush, in seconds.
+        """
+        if not self.running:
+            return
+        with self._submit_lock:
+            self._stopping.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error("Prediction writer still flushing after %ss, %d rows queued", timeout, self._queue.qsize())
+
+    def submit(self, row: dict) -> Future:
+        """
+        Queues a prediction row for the next bulk write.
+
+        Args:
+            row: The column values of the prediction.
+
+        Returns:
+            Future: Resolved with the id of the row once it is committed, or
+            with the error that prevented the write.
+
+        Raises:
+            QueueFull: If the queue stayed full for ``enqueue_timeout`` seconds.
+            RuntimeError: If the writer is not running.
+        """
+        deadline = time.monotonic() + self.enqueue_timeout
+        future = Future()
+        # Verrou tenu pendant l'attente de place : stop() ne peut pas lever son drapeau entre le test et le put
+        try:
+            if not self._submit_lock.acquire(timeout=self.enqueue_timeout):
+                raise queue.Full
+            try:
+                if not self.running or self._stopping.is_set():
+                    raise RuntimeError("Prediction writer is not running")
+                self._queue.put((row, future), timeout=max(0, deadline - time.monotonic()))
+            finally:
+                self._submit_lock.release()
+        except queue.Full:
+            raise QueueFull(f"Ingestion queue full ({self._queue.maxsize} rows)")
+        return future
+
+    def stats(self) -> dict:
+        """Returns the current queue depth, dropped rows and configuration of the writer."""
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "dropped": self.dropped,
+            "queue_size": self._queue.maxsize,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+        }
+
+    def _next_batch(self) -> list:
+        """Waits for a first row, then collects rows until the batch is full or the interval elapsed."""
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            if deadline is None:
+                timeout = self.flush_interval
+            else:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                if batch or self._stopping.is_set():
+                    break
+                continue
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    def _flush(self, batch: list):
+        rows = [row for row, _ in batch]
+        try:
+            with Session(self.engine) as session:
+                ids = insert_predictions(session, rows)
+                session.commit()
+        except Exception as exc:
+            self.dropped += len(batch)
+            logger.exception("Failed to write %d queued predictions, %d dropped so far", len(batch), self.dropped)
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        for (_, future), row_id in zip(batch, ids):
+            future.set_result(row_id)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+            elif self._stopping.is_set() and self._queue.empty():
+                return
+
+
+prediction_writer = PredictionWriter()
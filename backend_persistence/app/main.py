@@ -4,27 +4,44 @@ Main FastAPI application module that configures and launches the insurance predi
 This module:
 - Sets up the FastAPI application with CORS middleware
 - Configures exception handling and logging
-- Initializes database models on startup via lifespan context
+- Seeds the database models in a background task started from the lifespan context
+- Starts the write-behind prediction writer and flushes it on shutdown
+- Starts the periodic refresh of the daily prediction rollup
 - Includes API routes from the router module
 """
 
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 import os
 
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.routes import router
-from app.seed.seed import seed_models_if_needed
+from app.seed.seed import start_model_seeding
+from app.ingest import prediction_writer, WRITE_BEHIND
+from app.rollup import start_rollup_refresher, ROLLUP_REFRESH_INTERVAL
 
 SERVER_DOMAIN = os.getenv("SERVER_DOMAIN")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await seed_models_if_needed()
+    # Le service répond pendant que les modèles sont récupérés
+    seeding = start_model_seeding()
+    if WRITE_BEHIND:
+        prediction_writer.start()
+    rollup_refresher = start_rollup_refresher() if ROLLUP_REFRESH_INTERVAL > 0 else None
 
     yield
+
+    seeding.cancel()
+    with suppress(asyncio.CancelledError):
+        await seeding
+    if rollup_refresher is not None:
+        rollup_refresher.set()
+    # Écrit les prédictions encore en file avant l'arrêt
+    await asyncio.to_thread(prediction_writer.stop)
 app = FastAPI(lifespan=lifespan)
 
 @app.exception_handler(Exception)
@@ -0,0 +1,86 @@
+"""
+This module caches the ids of the ML models, looked up by name on every stored prediction.
+
+It provides:
+- An in-process, thread-safe name to id mapping
+- Lookups that only query the database on a miss
+"""
+
+import threading
+from typing import Dict, Iterable, Optional
+
+from sqlmodel import Session, select
+
+from app.models import ModelInfo
+
+
+class ModelIdCache:
+    """
+    In-process cache of model ids, keyed by model name.
+
+    Models are only ever added, so an id never goes stale. Unknown names are
+    not cached: a model created by another worker is found on the next
+    lookup.
+    """
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, session: Session, model_name: str) -> Optional[int]:
+        """
+        Returns the id of a model, querying the database on a miss.
+
+        Args:
+            session: The session used on a miss.
+            model_name: The name of the model.
+
+        Returns:
+            int | None: The id of the model, or ``None`` if it does not exist.
+        """
+        model_id = self._ids.get(model_name)
+        if model_id is not None:
+            return model_id
+
+        model_id = session.exec(
+            select(ModelInfo.id).where(ModelInfo.name == model_name)
+        ).first()
+        if model_id is not None:
+            with self._lock:
+                self._ids[model_name] = model_id
+        return model_id
+
+    def resolve_many(self, session: Session, model_names: Iterable[str]) -> Dict[str, int]:
+        """
+        Returns the ids of several models, querying the missing ones at once.
+
+        Returns:
+            dict: The ids of the models that exist, keyed by name.
+        """
+        names = set(model_names)
+        ids = {name: self._ids[name] for name in names if name in self._ids}
+        missing = names - set(ids)
+        if missing:
+            found = dict(session.exec(
+                select(ModelInfo.name, ModelInfo.id).where(ModelInfo.name.in_(missing))
+            ).all())
+            self.update(found)
+            ids.update(found)
+        return ids
+
+    def update(self, ids: Dict[str, int]):
+        """Adds known model ids to the cache."""
+        with self._lock:
+            self._ids.update(ids)
+
+    def warm(self, session: Session):
+        """Loads the ids of every model in the database."""
+        self.update(dict(session.exec(select(ModelInfo.name, ModelInfo.id)).all()))
+
+    def invalidate(self):
+        """Drops every cached id."""
+        with self._lock:
+            self._ids.clear()
+
+
+model_ids = ModelIdCache()
@@ -4,11 +4,15 @@ This module defines SQLModel classes for database modeling in the insurance pred
 Classes:
     ModelInfo: Represents an ML model's metadata and its relationship to predictions
     Prediction: Stores prediction results, user data, and insurance plan recommendations
+    PredictionDaily: Daily rollup of prediction counts and sums per model, region, smoker and risk level
+    RollupWatermark: Transaction id up to which predictions are folded into a rollup table
 """
 
 from typing import Optional, List
+from sqlalchemy import BigInteger, Column, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import SQLModel, Field, Relationship
-from datetime import datetime
+from datetime import date, datetime
 
 class ModelInfo(SQLModel, table=True):
     """Stores metadata about ML models used for predictions."""
@@ -18,6 +22,22 @@ class ModelInfo(SQLModel, table=True):
 
 class Prediction(SQLModel, table=True):
     """Stores individual prediction results including user data, predictions, and recommendations."""
+    # Index du listing de l'historique : trié par created_at DESC, filtré par modèle et par profil.
+    # Les index B-tree se parcourent à l'envers, donc created_at ASC sert aussi le tri DESC.
+    __table_args__ = (
+        Index("ix_prediction_created_at", "created_at"),
+        Index("ix_prediction_model_id_created_at", "model_id", "created_at"),
+        Index("ix_prediction_smoker_sex_region_created_at", "smoker", "sex", "region", "created_at"),
+        Index("ix_prediction_age_children", "age", "children"),
+        # Recherche des prédictions par facteur : top_factors @> '[{"feature": "smoker_yes"}]'
+        Index(
+            "ix_prediction_top_factors", "top_factors",
+            postgresql_using="gin", postgresql_ops={"top_factors": "jsonb_path_ops"}
+        ),
+        # Lectures incrémentales (rollup, snapshot) par plage de transactions
+        Index("ix_prediction_xact_id", "xact_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     nom: Optional[str] = None
@@ -37,15 +57,46 @@ class Prediction(SQLModel, table=True):
 
     plan_name: str
     franchise: float
-    ceiling: str
+    ceiling: Optional[float] = None  # NULL quand le plafond est infini
+    ceiling_is_infinite: bool = False
     refund_estimate: float
     annual_price: float
     monthly_price: float
 
-    suggestions: str
-    top_factors: str
+    suggestions: List[str] = Field(default_factory=list, sa_column=Column(JSONB, nullable=False))
+    # NULL quand les facteurs n'ont pas été calculés (explain=none), [] quand aucun ne ressort
+    top_factors: Optional[List[dict]] = Field(default=None, sa_column=Column(JSONB, nullable=True))
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Transaction qui a inséré la ligne, renseignée par la base : contrairement à created_at,
+    # elle ne peut pas être antidatée, et pg_snapshot_xmin dit quand toutes les plus anciennes sont finies
+    xact_id: Optional[int] = Field(default=None, sa_column=Column(
+        BigInteger, nullable=False, server_default=text("pg_current_xact_id()::text::bigint")
+    ))
 
     model_id: int = Field(foreign_key="modelinfo.id")
     model: Optional[ModelInfo] = Relationship(back_populates="predictions")
+
+# Facteur principal (le premier, par impact décroissant) de chaque prédiction
+Index("ix_prediction_top_factor", Prediction.top_factors[0]["feature"].astext)
+
+class PredictionDaily(SQLModel, table=True):
+    """Daily counts, sums and extremes of predictions, refreshed incrementally by ``app.rollup``."""
+    day: date = Field(primary_key=True)
+    model_id: int = Field(primary_key=True, foreign_key="modelinfo.id")
+    region: str = Field(primary_key=True)
+    smoker: bool = Field(primary_key=True)
+    risk_level: str = Field(primary_key=True)
+
+    count: int
+    prediction_sum: float
+    prediction_min: float
+    prediction_max: float
+    annual_price_sum: float
+    annual_price_min: float
+    annual_price_max: float
+
+class RollupWatermark(SQLModel, table=True):
+    """Transaction id below which every prediction is folded into a rollup table."""
+    name: str = Field(primary_key=True)
+    xact_id: int = Field(default=0, sa_column=Column(BigInteger, nullable=False))
@@ -0,0 +1,157 @@
+"""
+This module maintains the daily rollup of predictions used by the analytics queries.
+
+It provides:
+- An incremental refresh folding the predictions committed since the last refresh into PredictionDaily
+- A background thread refreshing the rollup periodically
+- A command line entry point: python -m app.rollup
+"""
+
+import logging
+import os
+import threading
+
+from sqlalchemy import Date, cast, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from app.database import get_engine
+from app.models import Prediction, PredictionDaily, RollupWatermark
+
+ROLLUP_NAME = "predictiondaily"
+ROLLUP_KEYS = ("day", "model_id", "region", "smoker", "risk_level")
+ROLLUP_METRICS = ("prediction", "annual_price")
+ROLLUP_REFRESH_INTERVAL = float(os.getenv("ROLLUP_REFRESH_INTERVAL", "60"))
+
+logger = logging.getLogger(__name__)
+
+
+def watermark_subquery():
+    """
+    Returns the transaction id below which predictions are folded into ``PredictionDaily``, as a scalar subquery.
+
+    Embedding it in a statement reads it from the same snapshot as the
+    rest of the statement.
+    """
+    return func.coalesce(
+        select(RollupWatermark.xact_id).where(RollupWatermark.name == ROLLUP_NAME).scalar_subquery(), 0
+    )
+
+
+def settled_xact_id(session: Session) -> int:
+    """
+    Returns the id of the oldest transaction still in flight.
+
+    Every transaction below this id is either committed or rolled back, so
+    the predictions whose ``xact_id`` is lower are all visible and no other
+    can appear among them. Incremental readers stop at this id to avoid
+    skipping the rows of transactions still in flight, however long they
+    run and whatever their ``created_at``.
+
+    Returns:
+        int: The ``xmin`` of the current snapshot.
+    """
+    return session.scalar(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"))
+
+
+def refresh_daily_rollup(session: Session) -> int:
+    """
+    Folds the predictions committed since the last refresh into ``PredictionDaily``.
+
+    The watermark is a transaction id: the predictions inserted by the
+    transactions between the watermark and :func:`settled_xact_id` are read
+    through the ``xact_id`` index, aggregated per day, model, region, smoker
+    and risk level, then added to the existing rollup rows with an upsert.
+    Predictions of transactions still in flight are left for the next
+    refresh. Predictions are expected to be append-only: updated or deleted
+    rows are not reflected in the rollup.
+
+    The watermark row is locked for the duration of the refresh, so
+    concurrent refreshes run one after the other. The session is committed.
+
+    Args:
+        session: The session used for the refresh.
+
+    Returns:
+        int: The number of predictions folded into the rollup.
+    """
+    # Lu avant toute écriture, tant que la transaction n'a pas d'id à elle
+    upper = settled_xact_id(session)
+    session.execute(
+        insert(RollupWatermark).values(name=ROLLUP_NAME, xact_id=0).on_conflict_do_nothing()
+    )
+    watermark = session.exec(
+        select(RollupWatermark).where(RollupWatermark.name == ROLLUP_NAME).with_for_update()
+    ).one()
+
+    if upper <= watermark.xact_id:
+        session.commit()
+        return 0
+    folded_range = (Prediction.xact_id >= watermark.xact_id, Prediction.xact_id < upper)
+
+    day = cast(Prediction.created_at, Date)
+    aggregates = [func.count()]
+    for metric in ROLLUP_METRICS:
+        column = getattr(Prediction, metric)
+        aggregates += [func.sum(column), func.min(column), func.max(column)]
+    rows = (
+        select(day, Prediction.model_id, Prediction.region, Prediction.smoker, Prediction.risk_level, *aggregates)
+        .where(*folded_range)
+        .group_by(day, Prediction.model_id, Prediction.region, Prediction.smoker, Prediction.risk_level)
+    )
+
+    columns = [*ROLLUP_KEYS, "count"]
+    for metric in ROLLUP_METRICS:
+        columns += [f"{metric}_sum", f"{metric}_min", f"{metric}_max"]
+
+    stmt = insert(PredictionDaily).from_select(columns, rows)
+    updates = {"count": PredictionDaily.count + stmt.excluded["count"]}
+    for metric in ROLLUP_METRICS:
+        updates[f"{metric}_sum"] = getattr(PredictionDaily, f"{metric}_sum") + stmt.excluded[f"{metric}_sum"]
+        updates[f"{metric}_min"] = func.least(getattr(PredictionDaily, f"{metric}_min"), stmt.excluded[f"{metric}_min"])
+        updates[f"{metric}_max"] = func.greatest(getattr(PredictionDaily, f"{metric}_max"), stmt.excluded[f"{metric}_max"])
+    session.execute(stmt.on_conflict_do_update(index_elements=list(ROLLUP_KEYS), set_=updates))
+
+    folded = session.exec(
+        select(func.count())
+        .select_from(Prediction)
+        .where(*folded_range)
+    ).one()
+    watermark.xact_id = upper
+    session.add(watermark)
+    session.commit()
+    return folded
+
+
+def start_rollup_refresher(interval: float = ROLLUP_REFRESH_INTERVAL) -> threading.Event:
+    """
+    Starts a daemon thread refreshing the daily rollup now, then every ``interval`` seconds.
+
+    Args:
+        interval: The refresh period, in seconds.
+
+    Returns:
+        threading.Event: Set it to stop the thread.
+    """
+    stopping = threading.Event()
+
+    def run():
+        # Premier rafraîchissement au démarrage, pour ne pas servir un rollup vide
+        while True:
+            try:
+                with Session(get_engine()) as session:
+                    folded = refresh_daily_rollup(session)
+                if folded:
+                    logger.info("Folded %d predictions into the daily rollup", folded)
+            except Exception:
+                logger.exception("Daily rollup refresh failed")
+            if stopping.wait(interval):
+                return
+
+    threading.Thread(target=run, name="rollup-refresher", daemon=True).start()
+    return stopping
+
+
+if __name__ == "__main__":
+    with Session(get_engine()) as session:
+        print(f"Folded {refresh_daily_rollup(session)} predictions into the daily rollup.")
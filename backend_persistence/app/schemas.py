@@ -6,6 +6,7 @@ Models:
 - TopFactor: Schema for important factors affecting insurance prediction
 - Plan: Schema for insurance plan details and pricing
 - PredictionResponse: Complete response schema with prediction results and recommendations
+- PredictionRecord: A profile, its prediction response and the model name, as stored together
 """
 
 from pydantic import BaseModel, Field
@@ -40,5 +41,10 @@ class PredictionResponse(BaseModel):
     mae: float
     risk_level: Literal["lower", "moderate", "high"]
     plan: Plan
-    top_factors: List[TopFactor]
+    top_factors: Optional[List[TopFactor]] = None
     suggestions: List[str]
+
+class PredictionRecord(BaseModel):
+    profil: AssuranceProfil
+    response: PredictionResponse
+    model_name: str
@@ -4,26 +4,42 @@ This module generates fake insurance prediction data for testing and development
 It provides functionality to:
 - Connect to the backend API and wait for its availability
 - Create or retrieve ML model information
-- Generate random user profiles with Faker
-- Make API prediction calls with fake profiles
-- Store prediction results in the database
+- Generate random user profiles in batches with NumPy
+- Predict the profiles concurrently through the batch prediction endpoint of the API
+- Store prediction results in the database with chunked COPY loads, reporting throughput
+
+Usage:
+    python -m app.seed.fake_data [--rows 1000000] [--batch-size 1000] [--concurrency 8]
 """
 
+import argparse
 import os
-import random
-import json
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
+import numpy as np
 import requests
 from faker import Faker
+from requests.adapters import HTTPAdapter
 from sqlmodel import Session, select
 
 from app.database import get_engine
-from app.models import ModelInfo, Prediction
+from app.ingest import copy_predictions
+from app.models import ModelInfo
 
 BACKEND_URL = os.getenv("INSSURANCE_BACKEND_URL", "http://inssurance_backend:8000")
-N = 1000
+N = int(os.getenv("SEED_ROWS", "1000"))
+BATCH_SIZE = int(os.getenv("SEED_BATCH_SIZE", "1000"))
+CONCURRENCY = int(os.getenv("SEED_CONCURRENCY", "8"))
+CHUNK_SIZE = int(os.getenv("SEED_CHUNK_SIZE", "10000"))
+DAYS = 365
+NAME_POOL_SIZE = 1000
+
+SEXES = np.array(["male", "female"])
+REGIONS = np.array(["northeast", "southeast", "southwest"])
+
 faker = Faker()
 
 
@@ -42,82 +58,187 @@ def wait_for_backend(timeout: int = 60, interval: int = 2):
         time.sleep(interval)
     raise RuntimeError(f"Backend not ready after {timeout}s")
 
-def main():
+def get_models(session: Session) -> list:
+    """
+    Returns the models stored in the database, creating them from the backend if there are none.
     """
-    Seeds the database with prediction records by fetching model information
-    from a backend service, generating fake user data, and interacting with
-    an external API to obtain prediction results. The function commits the
-    seeded data into the database using a provided session.
+    models = session.exec(select(ModelInfo)).all()
+    if models:
+        return models
+
+    resp = requests.get(f"{BACKEND_URL}/models")
+    resp.raise_for_status()
+    api_models = resp.json()
+    if isinstance(api_models, dict):
+        names = list(api_models.keys())
+    elif isinstance(api_models, list) and api_models and isinstance(api_models[0], dict):
+        names = [m["name"] for m in api_models]
+    else:
+        names = list(api_models)
+    for name in names:
+        session.add(ModelInfo(name=name))
+    session.commit()
+    return session.exec(select(ModelInfo)).all()
 
-    :return: None
+def generate_profiles(rng: np.random.Generator, size: int, first_names: np.ndarray, last_names: np.ndarray) -> list:
     """
-    wait_for_backend()
+    Draws random insurance profiles, one NumPy draw per field for the whole batch.
 
-    engine = get_engine()
-    session = Session(engine)
+    Names are sampled from pools generated once with Faker, since calling
+    Faker for every row dominates the generation time.
 
-    models = session.exec(select(ModelInfo)).all()
-    if not models:
-        resp = requests.get(f"{BACKEND_URL}/models")
-        resp.raise_for_status()
-        api_models = resp.json()
-        if isinstance(api_models, dict):
-            names = list(api_models.keys())
-        elif isinstance(api_models, list) and api_models and isinstance(api_models[0], dict):
-            names = [m["name"] for m in api_models]
-        else:
-            names = list(api_models)
-        for name in names:
-            session.add(ModelInfo(name=name))
-        session.commit()
-        models = session.exec(select(ModelInfo)).all()
-
-    for _ in range(N):
-        model = random.choice(models)
-        profil = {
-            "nom": faker.first_name(),
-            "prenom": faker.last_name(),
-            "age": random.randint(18, 80),
-            "sex": random.choice(["male", "female"]),
-            "bmi": round(random.uniform(15, 40), 1),
-            "children": random.randint(0, 5),
-            "smoker": random.choice([True, False]),
-            "region": random.choice(["northeast", "southeast", "southwest"])
-        }
-        data = requests.post(
-            f"{BACKEND_URL}/models/{model.name}/predict",
-            json=profil
-        ).json()
-
-        record = Prediction(
-            nom=profil["nom"],
-            prenom=profil["prenom"],
-            age=profil["age"],
-            sex=profil["sex"],
-            bmi=profil["bmi"],
-            children=profil["children"],
-            smoker=profil["smoker"],
-            region=profil["region"],
-            prediction=data["prediction"],
-            interval_min=data["interval"][0],
-            interval_max=data["interval"][1],
-            mae=data["mae"],
-            risk_level=data["risk_level"],
-            plan_name=data["plan"]["name"],
-            franchise=data["plan"]["franchise"],
-            ceiling=str(data["plan"]["ceiling"]),
-            refund_estimate=data["plan"]["refund_estimate"],
-            annual_price=data["plan"]["annual_price"],
-            monthly_price=data["plan"]["monthly_price"],
-            suggestions=json.dumps(data.get("suggestions", [])),
-            top_factors=json.dumps(data.get("top_factors", [])),
-            model_id=model.id,
-            created_at=datetime.now() - timedelta(days=random.randint(0, 365))
-        )
-        session.add(record)
+    Args:
+        rng: The random generator.
+        size: The number of profiles to draw.
+        first_names: The pool of first names.
+        last_names: The pool of last names.
 
-    session.commit()
-    print(f"Seeded {N} real predictions via API.")
+    Returns:
+        list: The profiles, as dictionaries matching ``AssuranceProfil``.
+    """
+    columns = {
+        "nom": rng.choice(first_names, size).tolist(),
+        "prenom": rng.choice(last_names, size).tolist(),
+        "age": rng.integers(18, 81, size).tolist(),
+        "sex": rng.choice(SEXES, size).tolist(),
+        "bmi": np.round(rng.uniform(15, 40, size), 1).tolist(),
+        "children": rng.integers(0, 6, size).tolist(),
+        "smoker": (rng.random(size) < 0.5).tolist(),
+        "region": rng.choice(REGIONS, size).tolist(),
+    }
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+def predict_batch(http: requests.Session, model_name: str, profiles: list) -> list:
+    """
+    Predicts a batch of profiles with a single call to the batch prediction endpoint.
+    """
+    resp = http.post(f"{BACKEND_URL}/models/{model_name}/predict/batch", json=profiles)
+    resp.raise_for_status()
+    return resp.json()
+
+def prediction_row(profil: dict, data: dict, model_id: int, created_at: datetime) -> dict:
+    """
+    Flattens a profile and its predicted response into ``Prediction`` column values.
+    """
+    plan = data["plan"]
+    return dict(
+        nom=profil["nom"],
+        prenom=profil["prenom"],
+        age=profil["age"],
+        sex=profil["sex"],
+        bmi=profil["bmi"],
+        children=profil["children"],
+        smoker=profil["smoker"],
+        region=profil["region"],
+        prediction=data["prediction"],
+        interval_min=data["interval"][0],
+        interval_max=data["interval"][1],
+        mae=data["mae"],
+        risk_level=data["risk_level"],
+        plan_name=plan["name"],
+        franchise=plan["franchise"],
+        ceiling=None if plan["ceiling"] == "Infinite" else plan["ceiling"],
+        ceiling_is_infinite=plan["ceiling"] == "Infinite",
+        refund_estimate=plan["refund_estimate"],
+        annual_price=plan["annual_price"],
+        monthly_price=plan["monthly_price"],
+        suggestions=data.get("suggestions", []),
+        top_factors=data.get("top_factors"),
+        created_at=created_at,
+        model_id=model_id
+    )
+
+def seed(rows: int = N, batch_size: int = BATCH_SIZE, concurrency: int = CONCURRENCY,
+         chunk_size: int = CHUNK_SIZE, days: int = DAYS, seed_value=None) -> int:
+    """
+    Seeds the database with predictions of random profiles made by the backend.
+
+    Profiles are drawn in batches, each predicted by one call to the batch
+    endpoint, with up to ``concurrency`` calls in flight over a pooled HTTP
+    session. Profiles rejected by the backend are counted and skipped.
+    Predicted rows are loaded with COPY and committed every ``chunk_size``
+    rows, and the throughput is printed after each commit.
+
+    Args:
+        rows: The number of predictions to store.
+        batch_size: The number of profiles per prediction call.
+        concurrency: The maximum number of prediction calls in flight.
+        chunk_size: The number of rows per COPY and commit.
+        days: The spread of the ``created_at`` dates, back from now.
+        seed_value: The seed of the random generator, for reproducible data.
+
+    Returns:
+        int: The number of predictions stored.
+    """
+    rng = np.random.default_rng(seed_value)
+    first_names = np.array([faker.first_name() for _ in range(NAME_POOL_SIZE)])
+    last_names = np.array([faker.last_name() for _ in range(NAME_POOL_SIZE)])
+
+    http = requests.Session()
+    http.mount("http://", HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency))
+    http.mount("https://", HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency))
+
+    with Session(get_engine()) as session, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        models = get_models(session)
+        now = datetime.now()
+        start = time.perf_counter()
+        stored = 0
+        chunk = []
+        in_flight = deque()
+        submitted = 0
+        rejected = 0
+
+        def flush():
+            nonlocal stored, chunk
+            copy_predictions(session, chunk)
+            session.commit()
+            stored += len(chunk)
+            chunk = []
+            elapsed = time.perf_counter() - start
+            print(f"{stored}/{rows} predictions stored, {stored / elapsed:,.0f} rows/s")
+
+        while submitted < rows or in_flight:
+            # Garde au plus 2 lots par worker en vol pour borner la mémoire
+            while submitted < rows and len(in_flight) < 2 * concurrency:
+                size = min(batch_size, rows - submitted)
+                model = models[rng.integers(len(models))]
+                profiles = generate_profiles(rng, size, first_names, last_names)
+                ages = rng.uniform(0, days * 86400, size)
+                future = executor.submit(predict_batch, http, model.name, profiles)
+                in_flight.append((future, model.id, profiles, ages))
+                submitted += size
+
+            future, model_id, profiles, ages = in_flight.popleft()
+            for profil, data, age in zip(profiles, future.result(), ages):
+                if "error" in data:
+                    rejected += 1
+                    continue
+                chunk.append(prediction_row(profil, data, model_id, now - timedelta(seconds=float(age))))
+            if len(chunk) >= chunk_size:
+                flush()
+
+        if chunk:
+            flush()
+
+    if rejected:
+        print(f"⚠️ {rejected} profiles rejected by the backend")
+    return stored
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the database with predictions of random profiles.")
+    parser.add_argument("--rows", type=int, default=N, help="Number of predictions to store")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Profiles per prediction call")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Prediction calls in flight")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows per COPY and commit")
+    parser.add_argument("--days", type=int, default=DAYS, help="Spread of the creation dates, in days")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the random generator")
+    args = parser.parse_args()
+
+    wait_for_backend()
+    start = time.perf_counter()
+    stored = seed(args.rows, args.batch_size, args.concurrency, args.chunk_size, args.days, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"Seeded {stored} real predictions via API in {elapsed:.1f}s ({stored / elapsed:,.0f} rows/s).")
 
 if __name__ == "__main__":
     main()
@@ -2,58 +2,157 @@
 This module handles the initial seeding of ML model metadata from the backend service.
 
 It provides:
-- Automatic fetching of model data from the backend API
-- Database seeding of ModelInfo records if they don't exist
-- Retry mechanism for backend connectivity issues
+- Non-blocking fetching of model data from the backend API, with exponential backoff
+- Database seeding of ModelInfo records if they don't exist, off the event loop
+- A background task started from the application lifespan
+- A seeding status reported by the readiness endpoint
+- Warming of the model id cache used when storing predictions
 """
 
+import asyncio
+import logging
 import os
+import time
+from typing import Optional
 
+import httpx
 from sqlmodel import Session, select
 
 from app.database import engine
 from app.models import ModelInfo
-import asyncio
-import requests
+from app.model_ids import model_ids
+
+SEED_TIMEOUT = float(os.getenv("SEED_TIMEOUT", "3"))
+SEED_RETRY_DELAY = float(os.getenv("SEED_RETRY_DELAY", "1"))
+SEED_RETRY_MAX_DELAY = float(os.getenv("SEED_RETRY_MAX_DELAY", "30"))
+
+logger = logging.getLogger(__name__)
+
 
-async def seed_models_if_needed():
+class SeedStatus:
     """
-    Fetches model metadata from backend and seeds the database if needed.
-    
-    Makes up to 5 attempts to connect to the backend service with 2 second delays
-    between retries. For each model returned by the backend, creates a ModelInfo
-    record if it doesn't already exist in the database.
+    Progress of the model seeding, as reported by the readiness endpoint.
+
+    The state goes from ``pending`` to ``seeding``, then to ``ready`` once
+    the models of the backend are stored. While the backend or the database
+    cannot be reached, it stays ``waiting`` between attempts.
     """
-    url = os.path.join(os.getenv("INSSURANCE_BACKEND_URL"), "models")
 
-    for attempt in range(5):
-        try:
-            response = requests.get(url, timeout=3)
-            response.raise_for_status()
-            models_data = response.json()
-            break
-        except Exception as e:
-            print(f"[Seed attempt {attempt + 1}] Backend not ready: {e}")
-            await asyncio.sleep(2)
-    else:
-        print("Backend unreachable. Skipping seeding.")
-        return
+    def __init__(self):
+        self.state = "pending"
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        self.inserted = 0
+        self.updated_at = time.time()
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def set(self, state: str, error: Optional[str] = None):
+        self.state = state
+        self.last_error = error
+        self.updated_at = time.time()
 
+    def stats(self) -> dict:
+        """Returns the current state of the seeding."""
+        return {
+            "ready": self.ready,
+            "state": self.state,
+            "attempts": self.attempts,
+            "inserted": self.inserted,
+            "last_error": self.last_error,
+            "updated_at": self.updated_at,
+        }
+
+
+seed_status = SeedStatus()
+
+
+def _store_models(models_data: dict) -> int:
+    """
+    Creates the ModelInfo records missing from the database, then warms the model id cache.
+
+    Args:
+        models_data: The models returned by the backend, keyed by name.
+
+    Returns:
+        int: The number of models inserted.
+    """
     with Session(engine) as session:
+        existing = set(session.exec(select(ModelInfo.name)).all())
+        inserted = 0
         for model_name, content in models_data.items():
-            # Vérifie s'il existe déjà
-            exists = session.exec(
-                select(ModelInfo).where(ModelInfo.name == model_name)
-            ).first()
-
-            if not exists:
-                print(f"Inserting model: {model_name}")
-                model = ModelInfo(
-                    name=model_name,
-                    metrics=content.get("metrics"),
-                    columns=content.get("columns")
-                )
-                session.add(model)
+            if model_name in existing:
+                continue
+            logger.info("Inserting model: %s", model_name)
+            session.add(ModelInfo(
+                name=model_name,
+                metrics=content.get("metrics"),
+                columns=content.get("columns")
+            ))
+            inserted += 1
 
         session.commit()
-        print("Seeding complete.")
+        model_ids.warm(session)
+        return inserted
+
+
+def _warm_model_ids():
+    """Loads the ids of the models already in the database."""
+    with Session(engine) as session:
+        model_ids.warm(session)
+
+
+async def seed_models_if_needed(status: SeedStatus = seed_status):
+    """
+    Fetches model metadata from backend and seeds the database if needed.
+
+    Attempts are retried until they succeed, waiting ``SEED_RETRY_DELAY``
+    seconds after the first failure and twice as long after each following
+    one, up to ``SEED_RETRY_MAX_DELAY``. After the first failure, the model
+    id cache is warmed with the models already stored, so predictions of
+    known models can be written meanwhile. Database work runs in a worker
+    thread, so the event loop keeps serving requests.
+
+    Args:
+        status: The status updated as the seeding progresses.
+    """
+    url = os.path.join(os.getenv("INSSURANCE_BACKEND_URL"), "models")
+    delay = SEED_RETRY_DELAY
+    warmed = False
+
+    async with httpx.AsyncClient(timeout=SEED_TIMEOUT) as client:
+        while True:
+            status.attempts += 1
+            status.set("seeding", status.last_error)
+            try:
+                response = await client.get(url)
+                response.raise_for_status()
+                status.inserted = await asyncio.to_thread(_store_models, response.json())
+                break
+            except Exception as e:
+                logger.warning("[Seed attempt %d] Backend not ready: %s", status.attempts, e)
+                status.set("waiting", str(e))
+
+            if not warmed:
+                try:
+                    await asyncio.to_thread(_warm_model_ids)
+                    warmed = True
+                except Exception:
+                    logger.exception("Cannot warm the model id cache")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, SEED_RETRY_MAX_DELAY)
+
+    status.set("ready")
+    logger.info("Seeding complete (%d models inserted).", status.inserted)
+
+
+def start_model_seeding() -> asyncio.Task:
+    """
+    Starts seeding the models in a background task of the running event loop.
+
+    Returns:
+        asyncio.Task: Cancel it to stop retrying.
+    """
+    return asyncio.create_task(seed_models_if_needed(), name="model-seeding")
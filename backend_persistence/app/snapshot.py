@@ -0,0 +1,189 @@
+"""
+This module writes the prediction history to Parquet files for offline analysis.
+
+It provides:
+- A Parquet dataset of predictions joined with their model name, partitioned by month and model
+- Bounded memory: rows are read through a server-side cursor and written in fixed-size record batches
+- Incremental runs: each run only exports the predictions committed since the previous one
+
+Usage:
+    python -m app.snapshot exports/predictions [--batch-size 50000] [--full]
+
+The dataset can be read back with ``pandas.read_parquet(path)`` or
+``pyarrow.dataset.dataset(path, partitioning="hive")``.
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Boolean, DateTime, Float, Integer
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Session
+
+from app.database import get_engine
+from app.export import EXPORT_COLUMNS, PREDICTION_COLUMNS, export_statement, iter_batches
+from app.models import Prediction
+from app.rollup import settled_xact_id
+
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "50000"))
+STATE_FILE = "_state.json"
+
+ARROW_TYPES = {
+    Integer: pa.int64(),
+    Float: pa.float64(),
+    Boolean: pa.bool_(),
+    DateTime: pa.timestamp("us"),
+}
+
+
+JSON_COLUMNS = [column.name for column in PREDICTION_COLUMNS if isinstance(column.type, JSONB)]
+
+
+def arrow_schema() -> pa.Schema:
+    """
+    Maps the columns of ``Prediction`` and the model name to an Arrow schema.
+
+    JSON columns are stored as JSON text, since the values of the top
+    factors mix numbers and strings.
+    """
+    fields = []
+    for column in PREDICTION_COLUMNS:
+        arrow_type = next(
+            (arrow_type for sql_type, arrow_type in ARROW_TYPES.items() if isinstance(column.type, sql_type)),
+            pa.string()
+        )
+        fields.append(pa.field(column.name, arrow_type, nullable=column.nullable))
+    fields.append(pa.field("model_name", pa.string(), nullable=False))
+    return pa.schema(fields)
+
+
+def read_state(output_dir: str) -> dict:
+    """
+    Returns the state of the previous runs on a dataset, ``{"xact_id": 0}`` for a new one.
+
+    Raises:
+        ValueError: If the state was written before the exports were tracked
+            by transaction id, in which case the dataset must be rewritten
+            with ``full``.
+    """
+    try:
+        with open(os.path.join(output_dir, STATE_FILE)) as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return {"xact_id": 0}
+    if "xact_id" not in state:
+        raise ValueError(f"{output_dir} was exported by id, rewrite it with --full")
+    return state
+
+
+def clear_dataset(output_dir: str):
+    """
+    Removes an existing dataset before a full export.
+
+    The whole directory is only removed when it holds the state file of this
+    tool. Otherwise only the ``month=*/model=*`` partitions are, so a
+    mistyped path does not wipe an unrelated directory.
+    """
+    if os.path.isfile(os.path.join(output_dir, STATE_FILE)):
+        shutil.rmtree(output_dir)
+        return
+    for directory in glob.glob(os.path.join(glob.escape(output_dir), "month=*", "model=*")):
+        shutil.rmtree(directory)
+        parent = os.path.dirname(directory)
+        if not os.listdir(parent):
+            os.rmdir(parent)
+
+
+def write_snapshot(output_dir: str, batch_size: int = SNAPSHOT_BATCH_SIZE, full: bool = False) -> dict:
+    """
+    Exports the predictions committed since the previous run to the Parquet dataset.
+
+    Each run adds one file per month and model it touches, under
+    ``month=YYYY-MM/model=<name>/``, holding one row group per batch. Files
+    are written under a hidden name and renamed once complete, and the state
+    file is only updated after every file is in place, so an interrupted run
+    is simply replayed by the next one.
+
+    Like the daily rollup, runs are delimited by transaction ids: a run
+    exports the predictions inserted by the transactions between the state
+    and the oldest one still in flight, see ``settled_xact_id``. Rows of
+    transactions still running are left for the next run, whatever their
+    ``created_at``.
+
+    Args:
+        output_dir: The root directory of the dataset.
+        batch_size: The number of rows read and written at a time.
+        full: Removes the existing dataset, see :func:`clear_dataset`, and
+            exports everything again.
+
+    Returns:
+        dict: The ``xact_id`` the export stopped at, and the number of
+        ``rows`` and ``files`` written by this run.
+    """
+    if full and os.path.isdir(output_dir):
+        clear_dataset(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    state = read_state(output_dir)
+    with Session(get_engine()) as session:
+        upper = settled_xact_id(session)
+    if upper <= state["xact_id"]:
+        return {"xact_id": state["xact_id"], "rows": 0, "files": 0}
+
+    schema = arrow_schema()
+    stmt = export_statement() \
+        .where(Prediction.xact_id >= state["xact_id"], Prediction.xact_id < upper)
+    part = f"part-{state['xact_id']:012d}-{upper:012d}.parquet"
+
+    writers = {}
+    rows = 0
+    try:
+        for batch in iter_batches(stmt, batch_size):
+            partitions = {}
+            for row in batch:
+                key = (row["created_at"].strftime("%Y-%m"), row["model_name"])
+                partitions.setdefault(key, []).append(row)
+
+            for (month, model_name), partition in partitions.items():
+                writer = writers.get((month, model_name))
+                if writer is None:
+                    directory = os.path.join(output_dir, f"month={month}", f"model={model_name}")
+                    os.makedirs(directory, exist_ok=True)
+                    writer = pq.ParquetWriter(os.path.join(directory, f".{part}"), schema)
+                    writers[(month, model_name)] = writer
+                columns = {name: [row[name] for row in partition] for name in EXPORT_COLUMNS}
+                for name in JSON_COLUMNS:
+                    columns[name] = [None if value is None else json.dumps(value) for value in columns[name]]
+                writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            rows += len(batch)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    for month, model_name in writers:
+        directory = os.path.join(output_dir, f"month={month}", f"model={model_name}")
+        os.replace(os.path.join(directory, f".{part}"), os.path.join(directory, part))
+
+    with open(os.path.join(output_dir, STATE_FILE), "w") as f:
+        json.dump({"xact_id": upper}, f)
+    return {"xact_id": upper, "rows": rows, "files": len(writers)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the prediction history to a Parquet dataset.")
+    parser.add_argument("output_dir", help="Root directory of the Parquet dataset")
+    parser.add_argument("--batch-size", type=int, default=SNAPSHOT_BATCH_SIZE, help="Rows per record batch")
+    parser.add_argument("--full", action="store_true", help="Rewrite the dataset from scratch")
+    args = parser.parse_args()
+
+    report = write_snapshot(args.output_dir, args.batch_size, args.full)
+    print(f"Exported {report['rows']} predictions to {report['files']} files, up to transaction {report['xact_id']}.")
+
+
+if __name__ == "__main__":
+    main()
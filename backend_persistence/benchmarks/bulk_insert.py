@@ -0,0 +1,97 @@
+"""
+Compares the throughput of the prediction write paths: ``COPY``, multi-row
+``INSERT`` and one ``INSERT`` per row, as done by ``POST /predictions/``.
+
+Every run is rolled back, so the benchmark leaves no rows behind. Run from
+the ``backend_persistence`` directory, against the database given by
+``DATABASE_URL``::
+
+    python -m benchmarks.bulk_insert
+"""
+
+import os
+import random
+import time
+from datetime import datetime
+
+from sqlmodel import Session, create_engine, select
+
+from app.ingest import copy_predictions, insert_predictions
+from app.models import ModelInfo, Prediction
+
+ROWS = int(os.getenv("BENCHMARK_ROWS", "20000"))
+SINGLE_ROWS = 1000
+MODEL_NAME = "benchmark_model"
+
+
+def random_row(model_id):
+    prediction = random.uniform(1000, 50000)
+    return {
+        "nom": None,
+        "prenom": None,
+        "age": random.randint(18, 80),
+        "sex": random.choice(["male", "female"]),
+        "bmi": round(random.uniform(15, 40), 1),
+        "children": random.randint(0, 5),
+        "smoker": random.choice([True, False]),
+        "region": random.choice(["northeast", "northwest", "southeast", "southwest"]),
+        "prediction": prediction,
+        "interval_min": prediction - 2500,
+        "interval_max": prediction + 2500,
+        "mae": 2500.0,
+        "risk_level": random.choice(["low", "moderate", "high"]),
+        "plan_name": "Essentiel",
+        "franchise": 500.0,
+        "ceiling": None,
+        "ceiling_is_infinite": True,
+        "refund_estimate": prediction * 0.8,
+        "annual_price": prediction * 1.1,
+        "monthly_price": prediction * 1.1 / 12,
+        "suggestions": ["Stop smoking"],
+        "top_factors": [{"feature": "smoker_yes", "shap_value": 23000.0, "value": 1.0}],
+        "created_at": datetime.utcnow(),
+        "model_id": model_id,
+    }
+
+
+def insert_one_by_one(session, rows):
+    ids = []
+    for row in rows:
+        prediction = Prediction(**row)
+        session.add(prediction)
+        session.flush()
+        ids.append(prediction.id)
+    return ids
+
+
+def run(engine, label, write, rows):
+    with Session(engine) as session:
+        model = session.exec(select(ModelInfo).where(ModelInfo.name == MODEL_NAME)).first()
+        if model is None:
+            model = ModelInfo(name=MODEL_NAME)
+            session.add(model)
+            session.flush()
+        for row in rows:
+            row["model_id"] = model.id
+
+        start = time.perf_counter()
+        ids = write(session, rows)
+        session.flush()
+        seconds = time.perf_counter() - start
+        session.rollback()
+
+    assert len(ids) == len(rows)
+    print(f"{label:<30} {len(rows):>8} rows {len(rows) / seconds:>12,.0f} rows/s")
+
+
+def main():
+    engine = create_engine(os.environ["DATABASE_URL"])
+    rows = [random_row(None) for _ in range(ROWS)]
+
+    run(engine, "COPY", copy_predictions, rows)
+    run(engine, "multi-row INSERT", insert_predictions, rows)
+    run(engine, "INSERT per row", insert_one_by_one, rows[:SINGLE_ROWS])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Measures the latency of the ``GET /predictions/`` history queries on a large
+``prediction`` table, without and with the indexes of ``Prediction``, and
+compares the exact count of each filter set with the planner estimate.
+
+The table is filled with ``BENCHMARK_ROWS`` synthetic predictions inside a
+transaction that is rolled back at the end, so the benchmark leaves the
+database as it found it. The indexes are dropped and created again within
+that same transaction. Run from the ``backend_persistence`` directory, against
+the database given by ``DATABASE_URL``::
+
+    python -m benchmarks.list_predictions
+"""
+
+import json
+import os
+import time
+
+from sqlalchemy import func, text
+from sqlmodel import Session, create_engine, select
+
+from app.api.routes import PredictionFilters
+from app.counts import Explain, estimate_count, exact_count
+from app.models import ModelInfo, Prediction
+
+ROWS = int(os.getenv("BENCHMARK_ROWS", "1000000"))
+REPEAT = 5
+PAGE_SIZE = 10
+
+SEED = text("""
+    INSERT INTO prediction (
+        age, sex, bmi, children, smoker, region,
+        prediction, interval_min, interval_max, mae, risk_level,
+        plan_name, franchise, ceiling, ceiling_is_infinite, refund_estimate, annual_price, monthly_price,
+        suggestions, top_factors, created_at, model_id
+    )
+    SELECT
+        18 + (random() * 62)::int,
+        (ARRAY['male', 'female'])[1 + (random() * 1)::int],
+        15 + random() * 25,
+        (random() * 5)::int,
+        random() < 0.2,
+        (ARRAY['northeast', 'northwest', 'southeast', 'southwest'])[1 + (random() * 3)::int],
+        p, p - 2500, p + 2500, 2500, 'moderate',
+        'Essentiel', 500, NULL, true, p * 0.8, p * 1.1, p * 1.1 / 12,
+        '[]', jsonb_build_array(jsonb_build_object(
+            'feature', (ARRAY['smoker_yes', 'age', 'bmi'])[1 + (random() * 2)::int],
+            'shap_value', random() * 20000,
+            'value', 1
+        )),
+        now() - random() * interval '365 days',
+        (:model_ids)[1 + (random() * (cardinality(:model_ids) - 1))::int]
+    FROM (SELECT 1000 + random() * 49000 AS p FROM generate_series(1, :n)) AS s
+""")
+
+SCENARIOS = {
+    "no filter": {},
+    "model_name": {"model_name": True},
+    "smoker + sex": {"smoker": True, "sex": "female"},
+    "smoker + sex + region": {"smoker": False, "sex": "male", "region": "southwest"},
+    "model_name + smoker": {"model_name": True, "smoker": True},
+    "age range + children": {"age_min": 30, "age_max": 35, "children_min": 3},
+    "top factor": {"top_factor": "bmi"},
+    "among factors": {"factor": "bmi"},
+}
+
+
+def history_query(model_name=None, sex=None, smoker=None, region=None,
+                  age_min=None, age_max=None, children_min=None, children_max=None,
+                  top_factor=None, factor=None):
+    """Builds the same statement as ``routes.list_predictions``."""
+    filters = PredictionFilters(
+        model_name=model_name, sex=sex, smoker=smoker, region=region,
+        age_min=age_min, age_max=age_max, children_min=children_min, children_max=children_max,
+        top_factor=top_factor, factor=factor
+    )
+    return filters.apply(
+        select(Prediction, ModelInfo.name.label("model_name"))
+        .join(ModelInfo, Prediction.model_id == ModelInfo.id)
+    )
+
+
+def explain(session, stmt):
+    """Returns the execution time and the top plan nodes of a statement."""
+    timings = []
+    for _ in range(REPEAT):
+        plan = session.execute(Explain(stmt, analyze=True)).scalar()
+        plan = plan[0] if isinstance(plan, list) else json.loads(plan)[0]
+        timings.append(plan["Execution Time"])
+
+    nodes = []
+    node = plan["Plan"]
+    while node is not None and len(nodes) < 4:
+        nodes.append(node.get("Index Name", node["Node Type"]))
+        node = (node.get("Plans") or [None])[0]
+    return min(timings), " > ".join(nodes)
+
+
+def run(session, label, model_name):
+    print(f"\n{label}")
+    print(f"{'scenario':<24} {'page (ms)':>10} {'count (ms)':>11} {'estimate (ms)':>14} {'error':>7}  plan")
+    for scenario, filters in SCENARIOS.items():
+        filters = dict(filters)
+        if filters.get("model_name"):
+            filters["model_name"] = model_name
+        stmt = history_query(**filters)
+        page = stmt.order_by(Prediction.created_at.desc()).offset(0).limit(PAGE_SIZE)
+        count = select(func.count()).select_from(stmt.subquery())
+
+        page_ms, plan = explain(session, page)
+        count_ms, _ = explain(session, count)
+
+        start = time.perf_counter()
+        estimate = estimate_count(session, stmt)
+        estimate_ms = (time.perf_counter() - start) * 1000
+        total = exact_count(session, stmt)
+        error = abs(estimate - total) / max(total, 1)
+        print(f"{scenario:<24} {page_ms:>10.2f} {count_ms:>11.2f} {estimate_ms:>14.2f} {error:>7.1%}  {plan}")
+
+
+def main():
+    engine = create_engine(os.environ["DATABASE_URL"])
+    indexes = Prediction.__table__.indexes
+
+    with Session(engine) as session:
+        models = session.exec(select(ModelInfo)).all()
+        if not models:
+            raise SystemExit("No model in the database, run the service once to seed them.")
+
+        start = time.perf_counter()
+        session.execute(SEED, {"n": ROWS, "model_ids": [model.id for model in models]})
+        session.execute(text("ANALYZE prediction"))
+        print(f"Seeded {ROWS:,} rows in {time.perf_counter() - start:.1f}s")
+
+        connection = session.connection()
+        for index in indexes:
+            index.drop(connection, checkfirst=True)
+        session.execute(text("ANALYZE prediction"))
+        run(session, "Without indexes", models[0].name)
+
+        for index in indexes:
+            index.create(connection)
+        session.execute(text("ANALYZE prediction"))
+        run(session, "With indexes", models[0].name)
+
+        session.rollback()
+
+        # reltuples survit au rollback : on remet les statistiques à jour
+        session.execute(text("ANALYZE prediction"))
+        session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Load test of the persistence service under concurrent history reads and inserts.
+
+Each client loops for ``BENCHMARK_DURATION`` seconds, sending a
+``GET /predictions/`` page read or a ``POST /predictions/`` insert, with
+``BENCHMARK_WRITE_RATIO`` of inserts. Requests per second and latency
+percentiles are reported per kind of request. Start the service first,
+once with ``DATABASE_ASYNC=false`` and once with ``DATABASE_ASYNC=true`` to
+compare the engines, then run from the ``backend_persistence`` directory::
+
+    python -m benchmarks.load
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import time
+
+import httpx
+
+URL = os.getenv("BENCHMARK_URL", "http://localhost:8001")
+CONCURRENCY = int(os.getenv("BENCHMARK_CONCURRENCY", "32"))
+DURATION = float(os.getenv("BENCHMARK_DURATION", "20"))
+WRITE_RATIO = float(os.getenv("BENCHMARK_WRITE_RATIO", "0.2"))
+
+PREDICTION = {
+    "profil": {"age": 35, "sex": "male", "bmi": 24.5, "children": 2, "smoker": True, "region": "northeast"},
+    "response": {
+        "prediction": 23450.0,
+        "interval": [20950.0, 25950.0],
+        "mae": 2500.0,
+        "risk_level": "high",
+        "plan": {
+            "name": "High", "franchise": 500.0, "ceiling": "Infinite",
+            "refund_estimate": 22950.0, "annual_price": 25795.0, "monthly_price": 2149.58
+        },
+        "top_factors": [{"feature": "smoker_yes", "shap_value": 23000.0, "value": 1}],
+        "suggestions": ["Stop smoking"]
+    }
+}
+
+
+async def client(http, model_name, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        if random.random() < WRITE_RATIO:
+            kind = "insert"
+            request = http.post("/predictions/", json={**PREDICTION, "model_name": model_name})
+        else:
+            kind = "read"
+            request = http.get("/predictions/", params={"limit": 10, "count": "estimate"})
+
+        start = time.perf_counter()
+        response = await request
+        latencies[kind].append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors[kind] += 1
+
+
+async def main():
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=URL, limits=limits, timeout=60) as http:
+        models = (await http.get("/models/")).json()
+        if not models:
+            raise SystemExit("No model in the database, run the service once to seed them.")
+
+        latencies = {"read": [], "insert": []}
+        errors = {"read": 0, "insert": 0}
+        deadline = time.perf_counter() + DURATION
+        await asyncio.gather(*(
+            client(http, models[0]["name"], deadline, latencies, errors) for _ in range(CONCURRENCY)
+        ))
+
+    print(f"{CONCURRENCY} clients, {DURATION:.0f}s, {WRITE_RATIO:.0%} inserts against {URL}")
+    print(f"{'request':<8} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'errors':>7}")
+    for kind, values in latencies.items():
+        if not values:
+            continue
+        p50, p95 = (q * 1000 for q in statistics.quantiles(values, n=20)[9::9])
+        print(f"{kind:<8} {len(values) / DURATION:>8.0f} {p50:>9.1f} {p95:>9.1f} {errors[kind]:>7}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
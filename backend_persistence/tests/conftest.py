@@ -0,0 +1,8 @@
+import os
+import sys
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Le paquet app est importé depuis le dossier du service ; le moteur ne se connecte qu'à la première requête
+sys.path.insert(0, SERVICE_DIR)
+os.environ.setdefault("DATABASE_URL", "postgresql://postgres@localhost/inssurance")
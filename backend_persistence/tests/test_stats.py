@@ -0,0 +1,62 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import analytics
+from app.analytics import DEFAULT_PERCENTILES
+from app.api.routes import router
+from app.database import get_session
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """
+    Replaces both statistics paths by stubs recording the percentiles they are called with.
+    """
+    calls = []
+
+    def rollup_stats(session, filters, group_by, bucket, start, end):
+        calls.append(("rollup", ()))
+        return []
+
+    def raw_stats(session, filters, group_by, bucket, percentiles, start, end, age_band_width):
+        calls.append(("raw", tuple(percentiles)))
+        return []
+
+    monkeypatch.setattr(analytics, "rollup_stats", rollup_stats)
+    monkeypatch.setattr(analytics, "raw_stats", raw_stats)
+    return calls
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_session] = lambda: None
+    return TestClient(app)
+
+
+def test_auto_uses_the_rollup_without_percentiles(client, calls):
+    response = client.get("/predictions/stats", params={"group_by": "region", "bucket": "month", "percentiles": "none"})
+    assert response.status_code == 200
+    assert response.json()["source"] == "rollup"
+    assert calls == [("rollup", ())]
+
+
+def test_auto_keeps_the_default_percentiles(client, calls):
+    response = client.get("/predictions/stats", params={"group_by": "region", "bucket": "month"})
+    assert response.json()["source"] == "raw"
+    assert calls == [("raw", DEFAULT_PERCENTILES)]
+
+
+def test_auto_uses_raw_predictions_when_the_rollup_cannot_answer(client, calls):
+    response = client.get("/predictions/stats", params={"group_by": "sex", "percentiles": "none"})
+    assert response.json()["source"] == "raw"
+    assert calls == [("raw", ())]
+
+
+@pytest.mark.parametrize("percentiles", [["1.5"], ["median"], ["none", "0.5"]])
+def test_invalid_percentiles_are_rejected(client, calls, percentiles):
+    response = client.get("/predictions/stats", params={"percentiles": percentiles})
+    assert response.status_code == 400
+    assert calls == []
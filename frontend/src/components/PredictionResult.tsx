@@ -92,13 +92,13 @@ const PredictionResult: React.FC<PredictionResultProps> = ({ result, reset }) =>
             <Card.Header as="h4" className="bg-info text-white">Facteurs principaux</Card.Header>
             <Card.Body>
                 <ListGroup>
-                    {result.top_factors.map((factor, i) => (
+                    {(result.top_factors ?? []).map((factor, i) => (
                         <ListGroup.Item key={i} className="d-flex justify-content-between">
                             <span><strong>{factor.feature}</strong>: {factor.value}</span>
                             <span>impact {factor.shap_value.toFixed(2)}</span>
                         </ListGroup.Item>
                     ))}
-                    {result.top_factors.length == 0 && (
+                    {!result.top_factors?.length && (
                         <Alert variant="warning">Le modèle sélectionné ne prend pas en charge les facteurs.</Alert>
                     )}
                 </ListGroup>
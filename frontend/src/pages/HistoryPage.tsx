@@ -244,7 +244,7 @@ const HistoryPage = () => {
                                             <tr><th>Intervalle</th><td>[{pred.interval_min}, {pred.interval_max}]</td></tr>
                                             <tr><th>MAE</th><td>{pred.mae}</td></tr>
                                             <tr><th>Franchise</th><td>{pred.franchise}</td></tr>
-                                            <tr><th>Plafond</th><td>{pred.ceiling}</td></tr>
+                                            <tr><th>Plafond</th><td>{pred.ceiling_is_infinite ? "Infinite" : pred.ceiling}</td></tr>
                                             <tr><th>Remboursement</th><td>{pred.refund_estimate}</td></tr>
                                             <tr><th>Annuel</th><td>{pred.annual_price}</td></tr>
                                             <tr><th>Mensuel</th><td>{pred.monthly_price}</td></tr>
@@ -252,9 +252,11 @@ const HistoryPage = () => {
                                             <tr>
                                                 <th>Top Factors</th>
                                                 <td>
-                                                    {topFactorsArr.map((f: any, i: number) => (
-                                                        <div key={i}>{f.feature}: {f.shap_value}</div>
-                                                    ))}
+                                                    {topFactorsArr === null
+                                                        ? "Non calculés"
+                                                        : topFactorsArr.map((f: any, i: number) => (
+                                                            <div key={i}>{f.feature}: {f.shap_value}</div>
+                                                        ))}
                                                 </td>
                                             </tr>
                                             </tbody>
@@ -19,7 +19,7 @@ export interface PredictionResponse {
     mae: number;
     risk_level: "lower" | "moderate" | "high";
     plan: Plan;
-    top_factors: TopFactor[];
+    top_factors: TopFactor[] | null;
     suggestions: string[];
 }
 
@@ -51,12 +51,13 @@ export interface Prediction {
     mae: number;
     plan_name: string;
     franchise: number;
-    ceiling: string;
+    ceiling: number | null;
+    ceiling_is_infinite: boolean;
     refund_estimate: number;
     annual_price: number;
     monthly_price: number;
     suggestions: string[];
-    top_factors: TopFactor[];
+    top_factors: TopFactor[] | null;
     created_at: string;
     model_name: string;
 }
\ No newline at end of file